@@ -0,0 +1,42 @@
+"""pyChess: a chess rules engine, search engine and game server.
+
+Importing the package does nothing but define it: the names below are
+imported from their modules the first time they are used, so a process that
+only needs the rules doesn't load the engine, the server or pygame. Only
+pychess.ui imports pygame, and modules import what only their command lines
+need inside main().
+"""
+from importlib import import_module
+
+# The module each name exported by the package is defined in. No name is
+# also the name of a module, which importing the module would replace.
+_EXPORTS = {
+    'GameBoard': 'chess_game',
+    'START_FEN': 'chess_game',
+    'Move': 'moves',
+    'move_name': 'moves',
+    'Engine': 'engine',
+    'SearchResult': 'engine',
+    'evaluate': 'evaluation',
+    'Game': 'pgn',
+    'read_games': 'pgn',
+    'GameRecord': 'record',
+    'OpeningBook': 'book',
+    'Tablebases': 'tablebase',
+    'GameServer': 'server',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    """Import <name> from its module the first time it is used."""
+    if name not in _EXPORTS:
+        raise AttributeError("module 'pychess' has no attribute " + repr(name))
+    value = getattr(import_module('.' + _EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
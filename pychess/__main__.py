@@ -0,0 +1,3 @@
+from .chess_game import play_chess
+
+play_chess()
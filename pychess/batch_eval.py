@@ -0,0 +1,244 @@
+"""Evaluating many chess positions at once with NumPy.
+
+A batch of positions is stacked into an (N, 12) array of bitboards, one row
+per position and one column per kind of piece. Material and piece-square
+scores are read straight from the bytes of the bitboards: BYTE_SCORES holds
+the summed square scores of every value each byte of each kind's bitboard
+can take, so a position is scored by 96 table lookups and a sum. Mobility
+comes from attack sets computed for every position at once with Kogge-Stone
+fills over the uint64 bitboards. No Python code runs per position once the
+batch is stacked.
+
+Without mobility the scores are the same as evaluation.evaluate gives.
+
+Usage:
+    python -m pychess.batch_eval bench [--positions N] [--seed SEED]
+"""
+import itertools
+import random
+import time
+from typing import List, Sequence
+
+import numpy as np
+
+from .bitboard import WHITE, KNIGHT, BISHOP, ROOK, QUEEN
+from .chess_game import GameBoard
+from .evaluation import SQUARE_SCORES, evaluate
+
+
+def _byte_scores() -> np.ndarray:
+    """Return the flattened (12, 8, 256) table of the summed square scores of
+    the pieces of each kind on the eight squares of each byte of a bitboard,
+    for every value of the byte."""
+    scores = np.array(SQUARE_SCORES, dtype=np.int32).reshape(12, 8, 8)
+    bits = np.arange(256)[:, None] >> np.arange(8) & 1
+    return np.einsum('kbi,vi->kbv', scores, bits).astype(np.int32).ravel()
+
+
+# BYTE_SCORES[(kind * 8 + i) * 256 + value] is the score of the pieces of
+# <kind> on the squares of byte <i> of its bitboard when that byte is
+# <value>.
+BYTE_SCORES = _byte_scores()
+
+# The offset into BYTE_SCORES of each of the 96 bytes of a row of bitboards,
+# as intp so np.take doesn't have to convert the indices.
+_BYTE_OFFSETS = np.arange(12 * 8, dtype=np.intp) * 256
+
+# The positions scored together by square_scores.
+_CHUNK_ROWS = 1024
+
+# Centipawns for each square attacked by a side's knights, bishops, rooks and
+# queens that isn't occupied by its own pieces. Squares attacked by two pieces
+# of the same type only count once.
+MOBILITY_WEIGHTS = {KNIGHT: 4, BISHOP: 5, ROOK: 2, QUEEN: 1}
+
+_NOT_A = np.uint64(0xFEFEFEFEFEFEFEFE)
+_NOT_H = np.uint64(0x7F7F7F7F7F7F7F7F)
+_NOT_AB = np.uint64(0xFCFCFCFCFCFCFCFC)
+_NOT_GH = np.uint64(0x3F3F3F3F3F3F3F3F)
+_ALL = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# Each direction a slider moves in, as (shift, mask): a positive shift moves
+# up the board with <<, a negative one down with >>, and the mask clears the
+# squares that a shift wraps around onto from the other edge.
+_ROOK_DIRECTIONS = ((8, _ALL), (-8, _ALL), (1, _NOT_A), (-1, _NOT_H))
+_BISHOP_DIRECTIONS = ((9, _NOT_A), (7, _NOT_H), (-7, _NOT_A), (-9, _NOT_H))
+
+
+def stack(games: Sequence[GameBoard]) -> tuple:
+    """Return the (bitboards, sides) arrays of the positions in <games>:
+    an (N, 12) uint64 array of the bitboards of each kind of piece, and an
+    (N,) array holding the side to move in each position."""
+    bitboards = np.fromiter(
+        itertools.chain.from_iterable([game.bitboards for game in games]),
+        dtype='<u8', count=12 * len(games)).reshape(len(games), 12)
+    sides = np.fromiter([game.side for game in games], dtype=np.int8,
+                        count=len(games))
+    return bitboards, sides
+
+
+def square_scores(bitboards: np.ndarray) -> np.ndarray:
+    """Return the material and piece-square score of each of the (N, 12)
+    <bitboards> from white's point of view."""
+    data = np.ascontiguousarray(bitboards, dtype='<u8')
+    data = data.view(np.uint8).reshape(len(data), 12 * 8)
+    scores = np.empty(len(data), dtype=np.int32)
+    # Scoring a chunk of rows at a time keeps the indices in cache.
+    for start in range(0, len(data), _CHUNK_ROWS):
+        rows = data[start:start + _CHUNK_ROWS]
+        scores[start:start + len(rows)] = np.take(
+            BYTE_SCORES, rows + _BYTE_OFFSETS).sum(axis=1, dtype=np.int32)
+    return scores
+
+
+def popcount(bitboards: np.ndarray) -> np.ndarray:
+    """Return the number of squares set in each of <bitboards>."""
+    data = np.ascontiguousarray(bitboards, dtype='<u8')
+    bytes_ = data.view(np.uint8).reshape(data.shape + (8,))
+    return np.unpackbits(bytes_, axis=-1).sum(axis=-1, dtype=np.int32)
+
+
+def _shift(bb: np.ndarray, shift: int) -> np.ndarray:
+    """Return <bb> moved <shift> squares up the board, or down if <shift> is
+    negative."""
+    if shift > 0:
+        return bb << np.uint64(shift)
+    return bb >> np.uint64(-shift)
+
+
+def _slide(pieces: np.ndarray, empty: np.ndarray, shift: int,
+           mask: np.uint64) -> np.ndarray:
+    """Return the squares sliders on <pieces> attack in one direction, given
+    the <empty> squares, by Kogge-Stone occluded fill."""
+    empty = empty & mask
+    pieces = pieces | empty & _shift(pieces, shift)
+    empty = empty & _shift(empty, shift)
+    pieces = pieces | empty & _shift(pieces, 2 * shift)
+    empty = empty & _shift(empty, 2 * shift)
+    pieces = pieces | empty & _shift(pieces, 4 * shift)
+    return _shift(pieces, shift) & mask
+
+
+def _slider_attacks(pieces: np.ndarray, empty: np.ndarray,
+                    directions: tuple) -> np.ndarray:
+    """Return the squares sliders on <pieces> attack in <directions>."""
+    attacks = np.zeros_like(pieces)
+    for shift, mask in directions:
+        attacks |= _slide(pieces, empty, shift, mask)
+    return attacks
+
+
+def _knight_attacks(knights: np.ndarray) -> np.ndarray:
+    """Return the squares knights on <knights> attack."""
+    return (_shift(knights, 17) & _NOT_A | _shift(knights, 15) & _NOT_H |
+            _shift(knights, 10) & _NOT_AB | _shift(knights, 6) & _NOT_GH |
+            _shift(knights, -6) & _NOT_AB | _shift(knights, -10) & _NOT_GH |
+            _shift(knights, -15) & _NOT_A | _shift(knights, -17) & _NOT_H)
+
+
+def mobility(bitboards: np.ndarray) -> np.ndarray:
+    """Return the mobility score of each of the (N, 12) <bitboards> from
+    white's point of view."""
+    by_colour = bitboards.reshape(len(bitboards), 2, 6)
+    own = np.bitwise_or.reduce(by_colour, axis=2)
+    empty = ~(own[:, 0] | own[:, 1])[:, None]
+    queens = by_colour[:, :, QUEEN]
+    attacks = {
+        KNIGHT: _knight_attacks(by_colour[:, :, KNIGHT]),
+        BISHOP: _slider_attacks(by_colour[:, :, BISHOP], empty,
+                                _BISHOP_DIRECTIONS),
+        ROOK: _slider_attacks(by_colour[:, :, ROOK], empty,
+                              _ROOK_DIRECTIONS),
+        QUEEN: _slider_attacks(queens, empty, _BISHOP_DIRECTIONS) |
+        _slider_attacks(queens, empty, _ROOK_DIRECTIONS),
+    }
+    score = np.zeros(len(bitboards), dtype=np.int32)
+    for piece_type, weight in MOBILITY_WEIGHTS.items():
+        counts = popcount(attacks[piece_type] & ~own)
+        score += weight * (counts[:, 0] - counts[:, 1])
+    return score
+
+
+def evaluate_arrays(bitboards: np.ndarray, sides: np.ndarray,
+                    with_mobility: bool = True) -> np.ndarray:
+    """Return the score of each position given as (N, 12) <bitboards> and
+    (N,) <sides> to move, from the point of view of the side to move."""
+    scores = square_scores(bitboards)
+    if with_mobility:
+        scores += mobility(bitboards)
+    return np.where(sides == WHITE, scores, -scores)
+
+
+def evaluate_batch(games: Sequence[GameBoard],
+                   with_mobility: bool = True) -> np.ndarray:
+    """Return the score of each position in <games> from the point of view
+    of the side to move, as an array of int32 centipawns."""
+    if not games:
+        return np.zeros(0, dtype=np.int32)
+    return evaluate_arrays(*stack(games), with_mobility)
+
+
+def random_positions(count: int, seed: int = 0) -> List[GameBoard]:
+    """Return <count> positions reached by random play from the start."""
+    rng = random.Random(seed)
+    games = []
+    game = GameBoard()
+    while len(games) < count:
+        moves = game.legal_moves()
+        if not moves or game.halfmove_clock >= 100 or len(game.history) > 150:
+            game = GameBoard()
+            continue
+        game.make_move(rng.choice(moves))
+        games.append(GameBoard.decode(game.encode()))
+    return games
+
+
+def benchmark(count: int, seed: int) -> None:
+    """Time scoring <count> random positions one at a time, stacking them
+    into arrays, and scoring the stacked arrays, and check that both give
+    the same material and square scores."""
+    games = random_positions(count, seed)
+
+    start = time.perf_counter()
+    single = [evaluate(game) for game in games]
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bitboards, sides = stack(games)
+    stack_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = evaluate_arrays(bitboards, sides, with_mobility=False)
+    batch_seconds = time.perf_counter() - start
+    if batch.tolist() != single:
+        raise AssertionError('batch scores differ from evaluate()')
+
+    start = time.perf_counter()
+    evaluate_arrays(bitboards, sides)
+    mobility_seconds = time.perf_counter() - start
+
+    for name, seconds in (('one at a time', single_seconds),
+                          ('stacking', stack_seconds),
+                          ('batch', batch_seconds),
+                          ('batch with mobility', mobility_seconds)):
+        print('{:20} {:8.3f}s {:10} positions/s'.format(
+            name, seconds, int(count / seconds)))
+    print('batch speedup {:.1f}x, {:.1f}x including stacking'.format(
+        single_seconds / batch_seconds,
+        single_seconds / (stack_seconds + batch_seconds)))
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Compare scoring positions one at a time and in batches.')
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--positions', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.positions, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Bitboard primitives for the chess GameBoard.
+
+A bitboard is an integer with one bit for each of the 64 squares of the board.
+Square 0 is row 0, column 0 of GameBoard.board and square 63 is row 7,
+column 7, so the index of a square is row * 8 + column. White starts on rows
+0 and 1, black on rows 6 and 7.
+"""
+from typing import Iterator
+
+WHITE = 0
+BLACK = 1
+COLOURS = ('white', 'black')
+
+PAWN = 0
+KNIGHT = 1
+BISHOP = 2
+ROOK = 3
+QUEEN = 4
+KING = 5
+
+# Kinds of piece are numbered colour * 6 + piece type, so there are twelve of
+# them. EMPTY marks a square with no piece on it.
+EMPTY = 12
+
+# The letter used for each piece type in piece names, e.g. 'wkb1' is the white
+# knight on b1.
+PIECE_LETTERS = 'pkbrQK'
+
+FILE_NAMES = 'abcdefgh'
+SQUARE_NAMES = [FILE_NAMES[sq % 8] + str(sq // 8 + 1) for sq in range(64)]
+
+FULL = (1 << 64) - 1
+# ROWS[i] holds every square in row i and COLUMNS[i] every square in column i.
+ROWS = [0xFF << (8 * i) for i in range(8)]
+COLUMNS = [0x0101010101010101 << i for i in range(8)]
+
+
+def square(row: int, col: int) -> int:
+    """Return the index of the square at <row>, <col>."""
+    return row * 8 + col
+
+
+def square_position(sq: int) -> tuple:
+    """Return the (row, column) tuple of square <sq>."""
+    return sq >> 3, sq & 7
+
+
+def piece_kind(colour: int, piece_type: int) -> int:
+    """Return the kind of piece of <piece_type> belonging to <colour>."""
+    return colour * 6 + piece_type
+
+
+def lsb(bb: int) -> int:
+    """Return the lowest square set in non-empty bitboard <bb>."""
+    return (bb & -bb).bit_length() - 1
+
+
+def popcount(bb: int) -> int:
+    """Return the number of squares set in <bb>."""
+    return bin(bb).count('1')
+
+
+def squares_of(bb: int) -> Iterator[int]:
+    """Yield every square set in <bb>, lowest first."""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def _step_targets(sq: int, steps: tuple) -> int:
+    """Return the squares reached from <sq> by each (row, column) step in
+    <steps> that stays on the board."""
+    row, col = square_position(sq)
+    bb = 0
+    for d_row, d_col in steps:
+        if 0 <= row + d_row < 8 and 0 <= col + d_col < 8:
+            bb |= 1 << square(row + d_row, col + d_col)
+    return bb
+
+
+def _ray(sq: int, d_row: int, d_col: int) -> int:
+    """Return the squares from <sq> (not included) to the edge of the board
+    in direction (<d_row>, <d_col>)."""
+    row, col = square_position(sq)
+    bb = 0
+    row, col = row + d_row, col + d_col
+    while 0 <= row < 8 and 0 <= col < 8:
+        bb |= 1 << square(row, col)
+        row, col = row + d_row, col + d_col
+    return bb
+
+
+KNIGHT_STEPS = ((2, 1), (2, -1), (-2, 1), (-2, -1),
+                (1, 2), (-1, 2), (1, -2), (-1, -2))
+KING_STEPS = ((0, 1), (0, -1), (1, 0), (-1, 0),
+              (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+KNIGHT_ATTACKS = [_step_targets(sq, KNIGHT_STEPS) for sq in range(64)]
+KING_ATTACKS = [_step_targets(sq, KING_STEPS) for sq in range(64)]
+# The squares a pawn of each colour attacks from each square.
+PAWN_ATTACKS = [[_step_targets(sq, ((1, 1), (1, -1))) for sq in range(64)],
+                [_step_targets(sq, ((-1, 1), (-1, -1))) for sq in range(64)]]
+
+# Rays in each direction. Moving up the board the square nearest the origin is
+# the lowest set bit of a ray, moving down it is the highest.
+NORTH = [_ray(sq, 1, 0) for sq in range(64)]
+EAST = [_ray(sq, 0, 1) for sq in range(64)]
+NORTH_EAST = [_ray(sq, 1, 1) for sq in range(64)]
+NORTH_WEST = [_ray(sq, 1, -1) for sq in range(64)]
+SOUTH = [_ray(sq, -1, 0) for sq in range(64)]
+WEST = [_ray(sq, 0, -1) for sq in range(64)]
+SOUTH_EAST = [_ray(sq, -1, 1) for sq in range(64)]
+SOUTH_WEST = [_ray(sq, -1, -1) for sq in range(64)]
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    """Return the squares a rook on <sq> attacks, given the <occupied> squares.
+    The first piece along each ray is included."""
+    north = NORTH[sq]
+    blockers = north & occupied
+    if blockers:
+        north ^= NORTH[(blockers & -blockers).bit_length() - 1]
+    east = EAST[sq]
+    blockers = east & occupied
+    if blockers:
+        east ^= EAST[(blockers & -blockers).bit_length() - 1]
+    south = SOUTH[sq]
+    blockers = south & occupied
+    if blockers:
+        south ^= SOUTH[blockers.bit_length() - 1]
+    west = WEST[sq]
+    blockers = west & occupied
+    if blockers:
+        west ^= WEST[blockers.bit_length() - 1]
+    return north | east | south | west
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    """Return the squares a bishop on <sq> attacks, given the <occupied>
+    squares. The first piece along each ray is included."""
+    north_east = NORTH_EAST[sq]
+    blockers = north_east & occupied
+    if blockers:
+        north_east ^= NORTH_EAST[(blockers & -blockers).bit_length() - 1]
+    north_west = NORTH_WEST[sq]
+    blockers = north_west & occupied
+    if blockers:
+        north_west ^= NORTH_WEST[(blockers & -blockers).bit_length() - 1]
+    south_east = SOUTH_EAST[sq]
+    blockers = south_east & occupied
+    if blockers:
+        south_east ^= SOUTH_EAST[blockers.bit_length() - 1]
+    south_west = SOUTH_WEST[sq]
+    blockers = south_west & occupied
+    if blockers:
+        south_west ^= SOUTH_WEST[blockers.bit_length() - 1]
+    return north_east | north_west | south_east | south_west
+
+
+def queen_attacks(sq: int, occupied: int) -> int:
+    """Return the squares a queen on <sq> attacks, given the <occupied>
+    squares."""
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+
+
+def _lines() -> tuple:
+    """Return the BETWEEN and LINE tables."""
+    between = [0] * 4096
+    line = [0] * 4096
+    for sq in range(64):
+        for d_row, d_col in KING_STEPS:
+            full = _ray(sq, d_row, d_col) | _ray(sq, -d_row, -d_col) | 1 << sq
+            passed = 0
+            row, col = square_position(sq)
+            row, col = row + d_row, col + d_col
+            while 0 <= row < 8 and 0 <= col < 8:
+                other = square(row, col)
+                between[sq << 6 | other] = passed
+                line[sq << 6 | other] = full
+                passed |= 1 << other
+                row, col = row + d_row, col + d_col
+    return between, line
+
+
+# BETWEEN[a << 6 | b] holds the squares strictly between squares a and b if
+# they share a row, column or diagonal, and LINE[a << 6 | b] the whole line
+# through them, edge to edge. Both are 0 for squares that aren't in line.
+BETWEEN, LINE = _lines()
@@ -0,0 +1,163 @@
+"""An opening book: the moves played in each position of a game collection.
+
+A book file is a sorted array of fixed-width records, each the Zobrist key
+of a position, a move played in it and how many games played it, packed as
+RECORD. Records are sorted by key, so the moves of a position are found by a
+binary search of the file memory-mapped as it is, with nothing to load or
+parse. Every process opening the same book shares one copy of it in the
+operating system's page cache.
+
+Usage:
+    python -m pychess.book build BOOK PGN [PGN ...] [--plies N]
+        [--min-count N]
+    python -m pychess.book probe BOOK [--fen FEN]
+"""
+import mmap
+import random
+import struct
+from typing import Iterable, List, Optional
+
+from .chess_game import GameBoard, START_FEN
+from .moves import Move, move_name
+from .pgn import open_pgn, read_games
+
+# Key, move and number of games, big-endian so the file is the same on every
+# machine.
+RECORD = struct.Struct('>QHH')
+
+_KEY = struct.Struct('>Q')
+
+
+def build(paths: Iterable[str], output: str, plies: int = 20,
+          min_count: int = 1) -> int:
+    """Write a book of the first <plies> moves of every game in the PGN files
+    at <paths> to <output>, leaving out moves played in fewer than
+    <min_count> games, and return the number of records written."""
+    counts = {}
+    for path in paths:
+        with open_pgn(path) as file:
+            for game in read_games(file):
+                board = game.start()
+                for move in game.moves[:plies]:
+                    entry = (board.key, move)
+                    counts[entry] = counts.get(entry, 0) + 1
+                    board.make_move(move)
+
+    records = sorted(entry for entry, count in counts.items()
+                     if count >= min_count)
+    with open(output, 'wb') as file:
+        for key, move in records:
+            file.write(RECORD.pack(key, move,
+                                   min(counts[key, move], 0xFFFF)))
+    return len(records)
+
+
+class OpeningBook:
+    """A book file opened for looking up positions.
+
+    === Attributes ===
+    path:
+        The path of the book file.
+    """
+    path: str
+    _data: Optional[mmap.mmap]
+    _size: int
+
+    def __init__(self, path: str) -> None:
+        """Open the book at <path>."""
+        self.path = path
+        with open(path, 'rb') as file:
+            file.seek(0, 2)
+            length = file.tell()
+            self._data = None
+            # mmap can't map an empty file.
+            if length:
+                self._data = mmap.mmap(file.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+        self._size = length // RECORD.size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getstate__(self) -> str:
+        """Pickle a book as its path, so each process maps the file itself."""
+        return self.path
+
+    def __setstate__(self, path: str) -> None:
+        self.__init__(path)
+
+    def close(self) -> None:
+        """Unmap the book file."""
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+    def entries(self, key: int) -> List[tuple]:
+        """Return the (move, count) of every move in the book for the
+        position with Zobrist <key>."""
+        data = self._data
+        if data is None:
+            return []
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if _KEY.unpack_from(data, middle * RECORD.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        while low < self._size:
+            record_key, move, count = RECORD.unpack_from(
+                data, low * RECORD.size)
+            if record_key != key:
+                break
+            entries.append((move, count))
+            low += 1
+        return entries
+
+    def choose(self, game: GameBoard,
+               rng: Optional[random.Random] = None) -> Optional[Move]:
+        """Return a book move for the position in <game>, or None if it isn't
+        in the book. The move played most often is chosen, or a move drawn
+        in proportion to how often each was played if <rng> is given."""
+        legal = game.legal_moves()
+        # Positions sharing a key with a book position get moves that don't
+        # belong to them, so only legal moves are taken.
+        entries = [(move, count) for move, count in self.entries(game.key)
+                   if move in legal]
+        if not entries:
+            return None
+        if rng is None:
+            return max(entries, key=lambda entry: entry[1])[0]
+        return rng.choices([move for move, _ in entries],
+                           [count for _, count in entries])[0]
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build or probe a book.')
+    parser.add_argument('command', choices=['build', 'probe'])
+    parser.add_argument('book')
+    parser.add_argument('pgn', nargs='*')
+    parser.add_argument('--plies', type=int, default=20,
+                        help='moves of each game to add to the book')
+    parser.add_argument('--min-count', type=int, default=1,
+                        help='games a move must be played in to be kept')
+    parser.add_argument('--fen', default=START_FEN)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        records = build(args.pgn, args.book, args.plies, args.min_count)
+        print('{} moves written to {}'.format(records, args.book))
+        return
+    book = OpeningBook(args.book)
+    game = GameBoard.from_fen(args.fen)
+    for move, count in sorted(book.entries(game.key),
+                              key=lambda entry: -entry[1]):
+        print('{} {}'.format(move_name(move), count))
+    book.close()
+
+
+if __name__ == '__main__':
+    main()
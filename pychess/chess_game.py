@@ -0,0 +1,1083 @@
+from typing import Callable, List, Optional, Sequence
+
+from .bitboard import (WHITE, BLACK, COLOURS, PAWN, KNIGHT, BISHOP, ROOK,
+                       QUEEN, KING, EMPTY, PIECE_LETTERS, SQUARE_NAMES, FULL,
+                       ROWS, COLUMNS, KNIGHT_ATTACKS, KING_ATTACKS,
+                       PAWN_ATTACKS, square, square_position, piece_kind, lsb,
+                       popcount, squares_of, rook_attacks, bishop_attacks,
+                       queen_attacks, BETWEEN, LINE)
+from .zobrist import PIECE_KEYS, CASTLING_KEYS, EP_KEYS, BLACK_TO_MOVE
+from .moves import (Move, QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE,
+                    CAPTURE, EN_PASSANT, PROMOTION, move_to, move_promotion)
+
+
+class Piece:
+    """A piece for playing a game on a chess GameBoard.
+
+    === Attributes ===
+    position:
+        A tuple referring to the row and column where the piece currently is.
+    allowed_moves:
+        A list of tuples containing all possible positions this piece could
+        move to.
+    """
+    position: tuple
+    allowed_moves: Sequence[tuple]
+    name: str
+    player: str
+    # Pieces are views made on demand, many at a time, so they keep their
+    # attributes in slots rather than a dict each.
+    __slots__ = ('position', 'allowed_moves', 'name', 'player')
+
+    def __init__(self, start: tuple, name: str, player: str) -> None:
+        """Initialize a piece at given start location."""
+        self.position = start
+        self.allowed_moves = ()
+        self.name = name
+        self.player = player
+
+    def get_allowed_moves(self) -> List[tuple]:
+        raise NotImplementedError
+
+
+def _positions(bb: int) -> List[tuple]:
+    """Return the (row, column) tuples of every square set in <bb>."""
+    return [POSITIONS[sq] for sq in squares_of(bb)]
+
+
+class Pawn(Piece):
+    """A pawn can move one space forward, or two if it has not moved yet.
+    It can capture by moving one space forward diagonally.
+
+    === Attributes ===
+    has_moved:
+        Boolean which tracks whether or not this piece has moved yet.
+    """
+    has_moved: bool
+    __slots__ = ('has_moved',)
+
+    def __init__(self, start: tuple, name: str, player: str) -> None:
+        Piece.__init__(self, start, name, player)
+        self.has_moved = False
+
+    def get_allowed_captures(self) -> List[tuple]:
+        return _positions(PAWN_ATTACKS[COLOURS.index(self.player)][
+            square(self.position[0], self.position[1])])
+
+    def get_allowed_moves(self) -> List[tuple]:
+        # noinspection PyListCreation
+        moves = []
+        if self.player == 'black':
+            moves.append((self.position[0] - 1, self.position[1]))
+            if self.has_moved is False:
+                moves.append((self.position[0] - 2, self.position[1]))
+
+        if self.player == 'white':
+            moves.append((self.position[0] + 1, self.position[1]))
+            if self.has_moved is False:
+                moves.append((self.position[0] + 2, self.position[1]))
+
+        return moves
+
+
+class Rook(Piece):
+    """A rook can move horizontally or vertically any number of spaces.
+
+    === Attributes ===
+    has_moved:
+        Boolean which tracks whether or not this piece has moved yet.
+    """
+    has_moved: bool
+    __slots__ = ('has_moved',)
+
+    def get_allowed_moves(self) -> List[tuple]:
+        return _positions(rook_attacks(
+            square(self.position[0], self.position[1]), 0))
+
+
+class Knight(Piece):
+    """A knight can move to a position that is two spaces away in one dimension
+    and one space away in the other."""
+    __slots__ = ()
+
+    def get_allowed_moves(self) -> List[tuple]:
+        return _positions(KNIGHT_ATTACKS[
+            square(self.position[0], self.position[1])])
+
+
+class Bishop(Piece):
+    """A bishop can move any number of spaces diagonally."""
+    __slots__ = ()
+
+    def get_allowed_moves(self) -> List[tuple]:
+        return _positions(bishop_attacks(
+            square(self.position[0], self.position[1]), 0))
+
+
+class Queen(Piece):
+    """A queen can move any number of spaces vertically, horizontally, or
+    diagonally."""
+    __slots__ = ()
+
+    def get_allowed_moves(self) -> List[tuple]:
+        return _positions(queen_attacks(
+            square(self.position[0], self.position[1]), 0))
+
+
+class King(Piece):
+    """A king can move one space at a time vertically, horizontally, or
+    diagonally
+
+    === Attributes ===
+    has_moved:
+        Boolean which tracks whether or not this piece has moved yet.
+    """
+    has_moved: bool
+    __slots__ = ('has_moved',)
+
+    def get_allowed_moves(self) -> List[tuple]:
+        return _positions(KING_ATTACKS[
+            square(self.position[0], self.position[1])])
+
+
+class Nil(Piece):
+    """A piece class for an empty square."""
+    __slots__ = ()
+
+    def get_allowed_moves(self) -> List[tuple]:
+        return []
+
+
+# The one Nil standing for every empty square, so views of the board don't
+# make a piece for each. It belongs to no square, so its position is None.
+NIL = Nil(None, '____', 'nil')
+
+# The (row, column) of each square and the name of a piece of each kind on
+# each square, made once and shared by every piece view.
+POSITIONS = [square_position(sq) for sq in range(64)]
+PIECE_NAMES = [[COLOURS[kind // 6][0] + PIECE_LETTERS[kind % 6] +
+                SQUARE_NAMES[sq] for sq in range(64)] for kind in range(12)]
+
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+
+# The piece types along each player's back row, from column 0 to column 7.
+BACK_ROW = (ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK)
+
+# The letter for each kind of piece in Forsyth-Edwards Notation (FEN).
+FEN_LETTERS = 'PNBRQKpnbrqk'
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# The size of a position packed by GameBoard.encode.
+POSITION_BYTES = 28
+
+# Castling rights, one bit each.
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING = 15
+
+# The castling rights that survive a move to or from each square; moving the
+# king or a rook, or capturing a rook, gives up the rights that depend on it.
+CASTLING_KEPT = [ALL_CASTLING] * 64
+CASTLING_KEPT[square(0, 0)] ^= WHITE_QUEENSIDE
+CASTLING_KEPT[square(0, 7)] ^= WHITE_KINGSIDE
+CASTLING_KEPT[square(0, 4)] ^= WHITE_KINGSIDE | WHITE_QUEENSIDE
+CASTLING_KEPT[square(7, 0)] ^= BLACK_QUEENSIDE
+CASTLING_KEPT[square(7, 7)] ^= BLACK_KINGSIDE
+CASTLING_KEPT[square(7, 4)] ^= BLACK_KINGSIDE | BLACK_QUEENSIDE
+
+# The squares of the king and rook each castling right needs, as (right,
+# colour, king square, rook square).
+CASTLING_SQUARES = ((WHITE_KINGSIDE, WHITE, square(0, 4), square(0, 7)),
+                    (WHITE_QUEENSIDE, WHITE, square(0, 4), square(0, 0)),
+                    (BLACK_KINGSIDE, BLACK, square(7, 4), square(7, 7)),
+                    (BLACK_QUEENSIDE, BLACK, square(7, 4), square(7, 0)))
+
+
+class Player:
+    """An object representing a player in a game.
+
+    === Attributes ===
+    name:
+        Either 'white' or 'black'.
+    colour:
+        WHITE or BLACK, the index of this player in the game's bitboards.
+    pieces:
+        A list containing all the pieces that belong to this player, built
+        from the game's bitboards.
+    """
+    name: str
+    colour: int
+    game: 'GameBoard'
+
+    def __init__(self, name: str, game: 'GameBoard') -> None:
+        self.name = name
+        self.colour = COLOURS.index(name)
+        self.game = game
+
+    @property
+    def pieces(self) -> List[Piece]:
+        return self.game.pieces_of(self.colour)
+
+
+class GameBoard:
+    """A game board for playing chess.
+
+    The position is stored as bitboards, one for each kind of piece, so a
+    position costs a handful of integers rather than a graph of Piece objects.
+    board, pieces and the pieces of each Player are views built from the
+    bitboards whenever they are asked for.
+
+    === Attributes ===
+    bitboards:
+        Twelve bitboards indexed by piece kind (colour * 6 + piece type), each
+        with a bit set for every square holding that kind of piece.
+    occupancy:
+        Bitboards of the squares occupied by white, by black, and by either.
+    squares:
+        The kind of piece on each of the 64 squares, or EMPTY, so the piece on
+        a square can be found without checking every bitboard.
+    board:
+        A list of lists creating an array, representing the squares of the game
+        board and the pieces on each square at a given time.
+    pieces:
+        A list of all the pieces in the game.
+    turn:
+        The turn number. White moves on odd turns and black moves on even turns.
+    castling:
+        The castling rights both players still have, as a set of bits.
+    ep_square:
+        The square a pawn passed over by moving two spaces on the last turn,
+        where it can be captured en passant, or -1.
+    halfmove_clock:
+        The number of turns since the last capture or pawn move.
+    key:
+        The Zobrist key of the position, kept up to date as moves are made.
+    history:
+        An undo record for every move made so far, so each can be taken back
+        without rebuilding the position.
+    players:
+        A list of the players in the game.
+    listeners:
+        Functions called with each move played with apply_move, once it has
+        been made, so a view of the game can follow it.
+    """
+    bitboards: List[int]
+    occupancy: List[int]
+    squares: bytearray
+    turn: int
+    castling: int
+    ep_square: int
+    halfmove_clock: int
+    key: int
+    history: List[tuple]
+    players: List[Player]
+    listeners: List[Callable[[Move], None]]
+    _legal_cache: List[list]
+
+    def __init__(self) -> None:
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0, 0]
+        self.squares = bytearray([EMPTY]) * 64
+        self.players = [Player('white', self), Player('black', self)]
+
+        for col, piece_type in enumerate(BACK_ROW):
+            self._put(piece_kind(WHITE, piece_type), square(0, col))
+            self._put(piece_kind(WHITE, PAWN), square(1, col))
+            self._put(piece_kind(BLACK, PAWN), square(6, col))
+            self._put(piece_kind(BLACK, piece_type), square(7, col))
+
+        self.turn = 1
+        self.castling = ALL_CASTLING
+        self.ep_square = -1
+        self.halfmove_clock = 0
+        self.history = []
+        self.key = self.compute_key()
+        self.listeners = []
+        self._legal_cache = []
+
+    def _set_position(self, bitboards: List[int], turn: int, castling: int,
+                      ep_square: int, halfmove_clock: int) -> None:
+        """Set the board up from the bitboards of each kind of piece and the
+        rest of the position, with no history."""
+        squares = bytearray([EMPTY]) * 64
+        key = CASTLING_KEYS[castling]
+        for kind, bb in enumerate(bitboards):
+            keys = PIECE_KEYS[kind]
+            while bb:
+                low = bb & -bb
+                sq = low.bit_length() - 1
+                squares[sq] = kind
+                key ^= keys[sq]
+                bb ^= low
+        white = bitboards[0] | bitboards[1] | bitboards[2] | bitboards[3] | \
+            bitboards[4] | bitboards[5]
+        black = bitboards[6] | bitboards[7] | bitboards[8] | bitboards[9] | \
+            bitboards[10] | bitboards[11]
+        if ep_square != -1:
+            key ^= EP_KEYS[ep_square & 7]
+        if turn % 2 == 0:
+            key ^= BLACK_TO_MOVE
+
+        self.bitboards = bitboards
+        self.occupancy = [white, black, white | black]
+        self.squares = squares
+        self.players = [Player('white', self), Player('black', self)]
+        self.turn = turn
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.history = []
+        self.key = key
+        self.listeners = []
+        self._legal_cache = []
+
+    @classmethod
+    def from_fen(cls, fen: str) -> 'GameBoard':
+        """Return a game board set up in the position described by <fen>, in
+        Forsyth-Edwards Notation. Raise ValueError if <fen> is malformed,
+        gives a castling right without the king and rook on their starting
+        squares or an en passant square no pawn just skipped, or has the side
+        not to move in check."""
+        fields = fen.split()
+        if len(fields) == 4:
+            fields += ['0', '1']
+        if len(fields) != 6:
+            raise ValueError('FEN needs 6 fields: ' + fen)
+        placement, side, castling, ep_square, halfmove, fullmove = fields
+
+        bitboards = [0] * 12
+        rows = placement.split('/')
+        if len(rows) != 8:
+            raise ValueError('FEN needs 8 rows: ' + fen)
+        for i, fen_row in enumerate(rows):
+            sq = square(7 - i, 0)
+            end = sq + 8
+            for letter in fen_row:
+                if letter in '12345678':
+                    sq += int(letter)
+                elif letter in FEN_LETTERS and sq < end:
+                    bitboards[FEN_LETTERS.index(letter)] |= 1 << sq
+                    sq += 1
+                else:
+                    raise ValueError('Bad FEN row: ' + fen_row)
+            if sq != end:
+                raise ValueError('Bad FEN row: ' + fen_row)
+        for colour in (WHITE, BLACK):
+            if popcount(bitboards[piece_kind(colour, KING)]) != 1:
+                raise ValueError('FEN needs one king per side: ' + fen)
+
+        if side not in ('w', 'b'):
+            raise ValueError('Bad side to move: ' + side)
+        rights = 0
+        if castling != '-':
+            for letter in castling:
+                if letter not in 'KQkq':
+                    raise ValueError('Bad castling rights: ' + castling)
+                rights |= 1 << 'KQkq'.index(letter)
+        for right, colour, king, rook in CASTLING_SQUARES:
+            if rights & right and not (
+                    bitboards[piece_kind(colour, KING)] >> king & 1 and
+                    bitboards[piece_kind(colour, ROOK)] >> rook & 1):
+                raise ValueError('Castling rights without the king and rook '
+                                 'in place: ' + castling)
+        if ep_square == '-':
+            ep = -1
+        elif ep_square in SQUARE_NAMES:
+            ep = SQUARE_NAMES.index(ep_square)
+            # The square a pawn of the side not to move just skipped over,
+            # with that pawn in front of it.
+            mover = WHITE if side == 'w' else BLACK
+            pushed = ep - 8 if mover == WHITE else ep + 8
+            if ep >> 3 != (5 if mover == WHITE else 2) or \
+                    not bitboards[piece_kind(1 - mover, PAWN)] >> pushed & 1 \
+                    or any(bb >> ep & 1 for bb in bitboards):
+                raise ValueError('No pawn can be taken en passant on ' +
+                                 ep_square)
+        else:
+            raise ValueError('Bad en passant square: ' + ep_square)
+        if not halfmove.isdigit() or not fullmove.isdigit():
+            raise ValueError('Bad move counters: ' + fen)
+
+        game = cls.__new__(cls)
+        game._set_position(bitboards,
+                           2 * max(int(fullmove), 1) - (side == 'w'),
+                           rights, ep, int(halfmove))
+        if game.in_check(1 - game.side):
+            raise ValueError('The side not to move is in check: ' + fen)
+        return game
+
+    def to_fen(self) -> str:
+        """Return the position in Forsyth-Edwards Notation."""
+        squares = self.squares
+        rows = []
+        for row in range(7, -1, -1):
+            fen_row = ''
+            empty = 0
+            for sq in range(row * 8, row * 8 + 8):
+                if squares[sq] == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    fen_row += str(empty)
+                    empty = 0
+                fen_row += FEN_LETTERS[squares[sq]]
+            if empty:
+                fen_row += str(empty)
+            rows.append(fen_row)
+        castling = ''.join(letter for i, letter in enumerate('KQkq')
+                           if self.castling >> i & 1) or '-'
+        ep_square = SQUARE_NAMES[self.ep_square] if self.ep_square != -1 \
+            else '-'
+        return ' '.join(['/'.join(rows), 'wb'[self.side], castling, ep_square,
+                         str(self.halfmove_clock), str((self.turn + 1) // 2)])
+
+    def encode(self) -> bytes:
+        """Return the position packed into POSITION_BYTES bytes.
+
+        The first 8 bytes are the bitboard of occupied squares and the next 16
+        hold the kind of piece on each occupied square, lowest square first,
+        4 bits each. The last 4 bytes are a little-endian int holding, from
+        the lowest bit up, the side to move (1 bit), the castling rights (4),
+        the en passant column plus one or 0 (4), the halfmove clock (8) and
+        the move number (15). Raise ValueError if the position has more than
+        32 pieces or its counters don't fit.
+        """
+        occupied = self.occupancy[2]
+        squares = self.squares
+        kinds = [squares[sq] for sq in squares_of(occupied)]
+        if len(kinds) > 32:
+            raise ValueError('Cannot encode more than 32 pieces')
+        kinds += [0] * (32 - len(kinds))
+        fullmove = (self.turn + 1) // 2
+        if self.halfmove_clock > 255 or fullmove > 32767:
+            raise ValueError('Move counters too large to encode')
+        ep_column = (self.ep_square & 7) + 1 if self.ep_square != -1 else 0
+        state = (self.side | self.castling << 1 | ep_column << 5 |
+                 self.halfmove_clock << 9 | fullmove << 17)
+        return (occupied.to_bytes(8, 'little') +
+                bytes([kinds[i] | kinds[i + 1] << 4 for i in range(0, 32, 2)]) +
+                state.to_bytes(4, 'little'))
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'GameBoard':
+        """Return a game board set up in the position packed into <data> by
+        encode."""
+        if len(data) != POSITION_BYTES:
+            raise ValueError('Encoded positions are {} bytes'.format(
+                POSITION_BYTES))
+        bitboards = [0] * 12
+        i = 16
+        for sq in squares_of(int.from_bytes(data[:8], 'little')):
+            bitboards[data[i >> 1] >> 4 * (i & 1) & 15] |= 1 << sq
+            i += 1
+        state = int.from_bytes(data[24:], 'little')
+        side = state & 1
+        ep_column = state >> 5 & 15
+        game = cls.__new__(cls)
+        game._set_position(bitboards, 2 * (state >> 17) - 1 + side,
+                           state >> 1 & 15,
+                           square(2 + 3 * (1 - side), ep_column - 1)
+                           if ep_column else -1,
+                           state >> 9 & 255)
+        return game
+
+    def __getstate__(self) -> bytes:
+        """Pickle the position as its POSITION_BYTES-byte encoding, so sending
+        a position to another process costs a few dozen bytes rather than the
+        whole object graph, followed by the 8-byte keys of the positions
+        since the last capture or pawn move, so repetitions of them are still
+        seen. The rest of the undo history is not included."""
+        history = self.history
+        earliest = max(len(history) - self.halfmove_clock, 0)
+        return self.encode() + b''.join(
+            entry[5].to_bytes(8, 'little') for entry in history[earliest:])
+
+    def __setstate__(self, state: bytes) -> None:
+        """Rebuild a game board from the bytes made by __getstate__. The
+        moves before the position can't be taken back, but repeating the
+        positions they passed through is detected."""
+        self.__dict__.update(GameBoard.decode(
+            state[:POSITION_BYTES]).__dict__)
+        self.players = [Player('white', self), Player('black', self)]
+        self.history = [
+            (None, None, None, None, None,
+             int.from_bytes(state[i:i + 8], 'little'))
+            for i in range(POSITION_BYTES, len(state), 8)]
+
+    def compute_key(self) -> int:
+        """Return the Zobrist key of the position, computed from scratch."""
+        key = CASTLING_KEYS[self.castling]
+        for sq in squares_of(self.occupancy[2]):
+            key ^= PIECE_KEYS[self.squares[sq]][sq]
+        if self.ep_square != -1:
+            key ^= EP_KEYS[self.ep_square & 7]
+        if self.side == BLACK:
+            key ^= BLACK_TO_MOVE
+        return key
+
+    def is_repetition(self) -> bool:
+        """Return whether the position has occurred before since the last
+        capture or pawn move."""
+        history = self.history
+        earliest = max(len(history) - self.halfmove_clock, 0)
+        for i in range(len(history) - 2, earliest - 1, -2):
+            if history[i][5] == self.key:
+                return True
+        return False
+
+    def repetitions(self) -> int:
+        """Return how many times the position has occurred, this time
+        included, since the last capture or pawn move."""
+        history = self.history
+        earliest = max(len(history) - self.halfmove_clock, 0)
+        count = 1
+        for i in range(len(history) - 2, earliest - 1, -2):
+            if history[i][5] == self.key:
+                count += 1
+        return count
+
+    def _put(self, kind: int, sq: int) -> None:
+        """Place a piece of <kind> on the empty square <sq>."""
+        bit = 1 << sq
+        self.bitboards[kind] |= bit
+        self.occupancy[kind // 6] |= bit
+        self.occupancy[2] |= bit
+        self.squares[sq] = kind
+
+    def piece_at(self, sq: int) -> Piece:
+        """Return a view of the piece on square <sq>, or NIL if the square is
+        empty."""
+        kind = self.squares[sq]
+        if kind == EMPTY:
+            return NIL
+        position = POSITIONS[sq]
+        row = position[0]
+
+        colour, piece_type = divmod(kind, 6)
+        piece = PIECE_CLASSES[piece_type](position, PIECE_NAMES[kind][sq],
+                                          COLOURS[colour])
+        if piece_type == PAWN:
+            piece.has_moved = row != (1 if colour == WHITE else 6)
+        elif piece_type == ROOK:
+            piece.has_moved = CASTLING_KEPT[sq] & self.castling == \
+                self.castling
+        elif piece_type == KING:
+            piece.has_moved = CASTLING_KEPT[sq] & self.castling == \
+                self.castling
+        return piece
+
+    def pieces_of(self, colour: int) -> List[Piece]:
+        """Return views of all the pieces belonging to <colour>."""
+        return [self.piece_at(sq) for sq in squares_of(self.occupancy[colour])]
+
+    @property
+    def board(self) -> List[List[Piece]]:
+        return [[self.piece_at(square(row, col)) for col in range(8)]
+                for row in range(8)]
+
+    @property
+    def pieces(self) -> List[Piece]:
+        return [self.piece_at(sq) for sq in squares_of(self.occupancy[2])]
+
+    @property
+    def side(self) -> int:
+        """WHITE or BLACK, whichever is to move this turn."""
+        return WHITE if self.turn % 2 == 1 else BLACK
+
+    def generate_moves(self, side: Optional[int] = None,
+                       captures_only: bool = False) -> List[Move]:
+        """Return every pseudo-legal move for <side>, or for the side to move
+        if <side> is not given. Moves that leave the king in check are
+        included; legal_moves leaves them out.
+
+        If <captures_only> is true, only captures and promotions are returned.
+        """
+        if side is None:
+            side = self.side
+        return self._generate(side, captures_only, FULL, 0, -1, [])
+
+    def _generate(self, side: int, captures_only: bool, evasions: int,
+                  pinned: int, king: int, moves: List[Move]) -> List[Move]:
+        """Add the moves of <side> to <moves> and return it. Pieces other
+        than the king may only move to the squares in <evasions>, and the
+        <pinned> pieces only along the line through them and the king on
+        square <king>. If <king> is -1, moves are pseudo-legal; otherwise the
+        king is kept out of check too.
+        """
+        bitboards = self.bitboards
+        enemy = self.occupancy[1 - side]
+        empty = ~self.occupancy[2] & FULL
+        targets = enemy if captures_only else enemy | empty
+        base = side * 6
+
+        pawns = bitboards[base + PAWN]
+        if side == WHITE:
+            single = (pawns << 8) & empty
+            double = ((single & ROWS[2]) << 8) & empty
+            left = ((pawns & ~COLUMNS[0]) << 7) & enemy
+            right = ((pawns & ~COLUMNS[7]) << 9) & enemy
+            last_row = ROWS[7]
+            forward, left_offset, right_offset = 8, 7, 9
+        else:
+            single = (pawns >> 8) & empty
+            double = ((single & ROWS[5]) >> 8) & empty
+            left = ((pawns & ~COLUMNS[0]) >> 9) & enemy
+            right = ((pawns & ~COLUMNS[7]) >> 7) & enemy
+            last_row = ROWS[0]
+            forward, left_offset, right_offset = -8, -9, -7
+        if captures_only:
+            single &= last_row
+            double = 0
+        for bb, offset, flags in ((single & evasions, forward, QUIET),
+                                  (left & evasions, left_offset, CAPTURE),
+                                  (right & evasions, right_offset, CAPTURE)):
+            while bb:
+                low = bb & -bb
+                stop = low.bit_length() - 1
+                start = stop - offset
+                bb ^= low
+                if pinned >> start & 1 and not LINE[king << 6 | start] & low:
+                    continue
+                move = start | stop << 6
+                if low & last_row:
+                    for promotion in range(4):
+                        moves.append(move | (flags | PROMOTION | promotion)
+                                     << 12)
+                else:
+                    moves.append(move | flags << 12)
+        double &= evasions
+        while double:
+            low = double & -double
+            stop = low.bit_length() - 1
+            start = stop - 2 * forward
+            double ^= low
+            if pinned >> start & 1 and not LINE[king << 6 | start] & low:
+                continue
+            moves.append(start | stop << 6 | DOUBLE_PUSH << 12)
+        # Only the side to move can take en passant.
+        if self.ep_square != -1 and side == self.side:
+            bb = PAWN_ATTACKS[1 - side][self.ep_square] & pawns
+            while bb:
+                low = bb & -bb
+                move = low.bit_length() - 1 | self.ep_square << 6 | \
+                    EN_PASSANT << 12
+                bb ^= low
+                # Taking en passant empties two squares of a row at once,
+                # which pin masks don't cover, so it is simply tried.
+                if king != -1:
+                    self.make_move(move)
+                    legal = not self.in_check(side)
+                    self.unmake_move()
+                    if not legal:
+                        continue
+                moves.append(move)
+
+        occupied = self.occupancy[2]
+        piece_targets = targets & evasions
+        for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            pieces = bitboards[base + piece_type]
+            while pieces:
+                low = pieces & -pieces
+                start = low.bit_length() - 1
+                pieces ^= low
+                if piece_type == KNIGHT:
+                    bb = KNIGHT_ATTACKS[start] & piece_targets
+                elif piece_type == BISHOP:
+                    bb = bishop_attacks(start, occupied) & piece_targets
+                elif piece_type == ROOK:
+                    bb = rook_attacks(start, occupied) & piece_targets
+                elif piece_type == QUEEN:
+                    bb = queen_attacks(start, occupied) & piece_targets
+                else:
+                    bb = KING_ATTACKS[start] & targets
+                if low & pinned:
+                    bb &= LINE[king << 6 | start]
+                while bb:
+                    low = bb & -bb
+                    stop = low.bit_length() - 1
+                    bb ^= low
+                    # The king's own square is left empty, so it can't hide
+                    # from a slider behind itself.
+                    if piece_type == KING and king != -1 and \
+                            self.is_attacked(stop, 1 - side,
+                                             occupied ^ 1 << start):
+                        continue
+                    if low & enemy:
+                        moves.append(start | stop << 6 | CAPTURE << 12)
+                    else:
+                        moves.append(start | stop << 6)
+
+        castling = self.castling >> 2 * side & 3
+        if castling and not captures_only:
+            king = square(7 * side, 4)
+            occupied = self.occupancy[2]
+            if castling & 1 and not occupied & 0x60 << king - 4 \
+                    and not self.is_attacked(king, 1 - side) \
+                    and not self.is_attacked(king + 1, 1 - side) \
+                    and not self.is_attacked(king + 2, 1 - side):
+                moves.append(king | (king + 2) << 6 | KING_CASTLE << 12)
+            if castling & 2 and not occupied & 0x0E << king - 4 \
+                    and not self.is_attacked(king, 1 - side) \
+                    and not self.is_attacked(king - 1, 1 - side) \
+                    and not self.is_attacked(king - 2, 1 - side):
+                moves.append(king | (king - 2) << 6 | QUEEN_CASTLE << 12)
+        return moves
+
+    def attackers(self, sq: int, colour: int,
+                  occupied: Optional[int] = None) -> int:
+        """Return the bitboard of the pieces belonging to <colour> that attack
+        <sq>, with sliders blocked by <occupied>, or by every piece on the
+        board if <occupied> is not given."""
+        bitboards = self.bitboards
+        base = colour * 6
+        if occupied is None:
+            occupied = self.occupancy[2]
+        queens = bitboards[base + QUEEN]
+        return (KNIGHT_ATTACKS[sq] & bitboards[base + KNIGHT] |
+                PAWN_ATTACKS[1 - colour][sq] & bitboards[base + PAWN] |
+                KING_ATTACKS[sq] & bitboards[base + KING] |
+                bishop_attacks(sq, occupied) &
+                (bitboards[base + BISHOP] | queens) |
+                rook_attacks(sq, occupied) & (bitboards[base + ROOK] | queens))
+
+    def is_attacked(self, sq: int, colour: int,
+                    occupied: Optional[int] = None) -> bool:
+        """Return whether any piece belonging to <colour> attacks <sq>, with
+        sliders blocked by <occupied>, or by every piece on the board if
+        <occupied> is not given."""
+        bitboards = self.bitboards
+        base = colour * 6
+        if KNIGHT_ATTACKS[sq] & bitboards[base + KNIGHT]:
+            return True
+        if PAWN_ATTACKS[1 - colour][sq] & bitboards[base + PAWN]:
+            return True
+        if KING_ATTACKS[sq] & bitboards[base + KING]:
+            return True
+        if occupied is None:
+            occupied = self.occupancy[2]
+        queens = bitboards[base + QUEEN]
+        if bishop_attacks(sq, occupied) & (bitboards[base + BISHOP] | queens):
+            return True
+        return bool(rook_attacks(sq, occupied) &
+                    (bitboards[base + ROOK] | queens))
+
+    def _cached(self) -> Optional[list]:
+        """Return the [key, moves, checkers, captures] cached for this
+        position, or None."""
+        ply = len(self.history)
+        if ply < len(self._legal_cache):
+            entry = self._legal_cache[ply]
+            if entry[0] == self.key:
+                return entry
+        return None
+
+    def in_check(self, side: Optional[int] = None) -> bool:
+        """Return whether the king of <side>, or of the side to move if <side>
+        is not given, is attacked."""
+        if side is None or side == self.side:
+            entry = self._cached()
+            if entry is not None:
+                return entry[2] != 0
+            side = self.side
+        return self.is_attacked(lsb(self.bitboards[side * 6 + KING]),
+                                1 - side)
+
+    def legal_moves(self, captures_only: bool = False) -> List[Move]:
+        """Return every legal move for the side to move, or only captures and
+        promotions if <captures_only> is true.
+
+        Pieces pinned to their king only move along the pin, and in check only
+        moves that take the checking piece, block it or move the king are
+        generated, so no move has to be made and taken back to be tested. The
+        full list is cached for the position, and the list returned is the
+        cached one: copy it before changing it.
+
+        Each ply of the game has its own two lists, for all moves and for
+        captures, which are emptied and filled again for the next position
+        reached at that ply, so searching allocates no new lists. Copy the
+        list to keep it after the game has gone back past this position.
+        """
+        entry = self._cached()
+        if entry is not None and not captures_only:
+            return entry[1]
+
+        side = self.side
+        bitboards = self.bitboards
+        enemy_base = (1 - side) * 6
+        king = lsb(bitboards[side * 6 + KING])
+        occupied = self.occupancy[2]
+        checkers = self.attackers(king, 1 - side)
+        if not checkers:
+            evasions = FULL
+        elif checkers & checkers - 1:
+            # Only the king can get out of a double check.
+            evasions = 0
+        else:
+            evasions = checkers | BETWEEN[king << 6 | lsb(checkers)]
+
+        pinned = 0
+        queens = bitboards[enemy_base + QUEEN]
+        snipers = rook_attacks(king, 0) & \
+            (bitboards[enemy_base + ROOK] | queens) | \
+            bishop_attacks(king, 0) & \
+            (bitboards[enemy_base + BISHOP] | queens)
+        while snipers:
+            low = snipers & -snipers
+            blockers = BETWEEN[king << 6 | low.bit_length() - 1] & occupied
+            if blockers and not blockers & blockers - 1:
+                pinned |= blockers
+            snipers ^= low
+        pinned &= self.occupancy[side]
+
+        ply = len(self.history)
+        cache = self._legal_cache
+        while len(cache) <= ply:
+            cache.append([-1, [], 0, []])
+        entry = cache[ply]
+        if captures_only:
+            moves = entry[3]
+            moves.clear()
+            return self._generate(side, True, evasions, pinned, king, moves)
+        # Zobrist keys are never negative, so if generating fails part way the
+        # emptied list can't pass for the position the entry held before.
+        entry[0] = -1
+        moves = entry[1]
+        moves.clear()
+        self._generate(side, False, evasions, pinned, king, moves)
+        entry[0] = self.key
+        entry[2] = checkers
+        return moves
+
+    def is_checkmate(self) -> bool:
+        """Return whether the side to move is in check with no legal moves."""
+        return not self.legal_moves() and self.in_check()
+
+    def is_stalemate(self) -> bool:
+        """Return whether the side to move is not in check but has no legal
+        moves."""
+        return not self.legal_moves() and not self.in_check()
+
+    def make_move(self, move: Move) -> None:
+        """Make <move> on the board and pass the turn to the other player,
+        recording what is needed to take it back with unmake_move."""
+        start = move & 63
+        stop = move >> 6 & 63
+        flags = move >> 12
+        bitboards = self.bitboards
+        occupancy = self.occupancy
+        squares = self.squares
+        kind = squares[start]
+        colour = kind // 6
+
+        key = self.key
+        captured = EMPTY
+        if flags & CAPTURE:
+            taken = stop if flags != EN_PASSANT else stop - 8 + 16 * colour
+            captured = squares[taken]
+            bit = 1 << taken
+            bitboards[captured] ^= bit
+            occupancy[1 - colour] ^= bit
+            occupancy[2] ^= bit
+            squares[taken] = EMPTY
+            key ^= PIECE_KEYS[captured][taken]
+        self.history.append((move, captured, self.castling, self.ep_square,
+                             self.halfmove_clock, self.key))
+
+        bits = 1 << start | 1 << stop
+        occupancy[colour] ^= bits
+        occupancy[2] ^= bits
+        squares[start] = EMPTY
+        key ^= PIECE_KEYS[kind][start]
+        if flags & PROMOTION:
+            bitboards[kind] ^= 1 << start
+            kind += KNIGHT + (flags & 3) - PAWN
+            bitboards[kind] ^= 1 << stop
+        else:
+            bitboards[kind] ^= bits
+        squares[stop] = kind
+        key ^= PIECE_KEYS[kind][stop]
+
+        if flags == KING_CASTLE or flags == QUEEN_CASTLE:
+            if flags == KING_CASTLE:
+                rook_start, rook_stop = stop + 1, stop - 1
+            else:
+                rook_start, rook_stop = stop - 2, stop + 1
+            rook = squares[rook_start]
+            bits = 1 << rook_start | 1 << rook_stop
+            bitboards[rook] ^= bits
+            occupancy[colour] ^= bits
+            occupancy[2] ^= bits
+            squares[rook_start] = EMPTY
+            squares[rook_stop] = rook
+            key ^= PIECE_KEYS[rook][rook_start] ^ PIECE_KEYS[rook][rook_stop]
+
+        castling = self.castling & CASTLING_KEPT[start] & CASTLING_KEPT[stop]
+        key ^= CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[castling]
+        self.castling = castling
+        if self.ep_square != -1:
+            key ^= EP_KEYS[self.ep_square & 7]
+        if flags == DOUBLE_PUSH:
+            self.ep_square = (start + stop) >> 1
+            key ^= EP_KEYS[self.ep_square & 7]
+        else:
+            self.ep_square = -1
+        self.key = key ^ BLACK_TO_MOVE
+        if captured != EMPTY or kind % 6 == PAWN or flags & PROMOTION:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        self.turn += 1
+
+    def unmake_move(self) -> Move:
+        """Take back the last move made and return it."""
+        move, captured, self.castling, self.ep_square, \
+            self.halfmove_clock, self.key = self.history.pop()
+        start = move & 63
+        stop = move >> 6 & 63
+        flags = move >> 12
+        bitboards = self.bitboards
+        occupancy = self.occupancy
+        squares = self.squares
+        kind = squares[stop]
+        colour = kind // 6
+
+        bits = 1 << start | 1 << stop
+        occupancy[colour] ^= bits
+        occupancy[2] ^= bits
+        squares[stop] = EMPTY
+        if flags & PROMOTION:
+            bitboards[kind] ^= 1 << stop
+            kind = colour * 6 + PAWN
+            bitboards[kind] ^= 1 << start
+        else:
+            bitboards[kind] ^= bits
+        squares[start] = kind
+
+        if flags == KING_CASTLE or flags == QUEEN_CASTLE:
+            if flags == KING_CASTLE:
+                rook_start, rook_stop = stop + 1, stop - 1
+            else:
+                rook_start, rook_stop = stop - 2, stop + 1
+            rook = squares[rook_stop]
+            bits = 1 << rook_start | 1 << rook_stop
+            bitboards[rook] ^= bits
+            occupancy[colour] ^= bits
+            occupancy[2] ^= bits
+            squares[rook_stop] = EMPTY
+            squares[rook_start] = rook
+
+        if captured != EMPTY:
+            taken = stop if flags != EN_PASSANT else stop - 8 + 16 * colour
+            bit = 1 << taken
+            bitboards[captured] ^= bit
+            occupancy[1 - colour] ^= bit
+            occupancy[2] ^= bit
+            squares[taken] = captured
+        self.turn -= 1
+        return move
+
+    def apply_move(self, move: Move) -> None:
+        """Play <move> in the game and tell the listeners about it."""
+        self.make_move(move)
+        for listener in self.listeners:
+            listener(move)
+
+    def ask_promotion(self) -> int:
+        """Ask which type of piece a pawn reaching the opposite end of the board
+        should be promoted to."""
+        while True:
+            promo_unit = input("What would you like to promote this pawn to, \n"
+                               "a 'queen', 'rook', 'bishop', or 'knight' ?")
+            if promo_unit not in ['queen', 'rook', 'bishop', 'knight']:
+                print("Invalid promotion.")
+                continue
+            break
+        return {'queen': QUEEN, 'rook': ROOK, 'bishop': BISHOP,
+                'knight': KNIGHT}[promo_unit]
+
+    def update_board(self) -> None:
+        """Print the board with the current positions of all pieces."""
+        for row in self.board:
+            print_row = ''
+            for pos in row:
+                print_row += ' ' + pos.name + ' '
+            print(print_row)
+
+    def move_piece(self, piece: Piece) -> bool:
+        """Ask where to move a piece and move it there. Returns true/false
+        based on whether or not that piece has successfully been moved."""
+        start = square(piece.position[0], piece.position[1])
+        moves = [move for move in self.legal_moves() if move & 63 == start]
+        piece.allowed_moves = list(dict.fromkeys(
+            square_position(move_to(move)) for move in moves))
+
+        if not piece.allowed_moves:
+            print("No possible moves.")
+            return False
+
+        print("Possible moves: " + str(piece.allowed_moves))
+
+        while True:
+            stop = (int(input("What row would you like to move " +
+                              piece.name + " to ?")),
+                    int(input("What column would you like to move " +
+                              piece.name + " to ?")))
+
+            if stop not in piece.allowed_moves:
+                print("That is not a valid move.")
+                continue
+
+            choices = [move for move in moves
+                       if move_to(move) == square(stop[0], stop[1])]
+            if len(choices) > 1:
+                promotion = self.ask_promotion()
+                choices = [move for move in choices
+                           if move_promotion(move) == promotion]
+
+            self.apply_move(choices[0])
+            self.update_board()
+            return True
+
+    def get_piece(self) -> Piece:
+        while True:
+            if self.turn % 2 == 1:
+                player = 'white'
+                piece_name = str(input("White, which piece would you" +
+                                       " like to move?"))
+            else:
+                player = 'black'
+                piece_name = str(input("Black, which piece would you" +
+                                       " like to move?"))
+            for piece in self.pieces:
+                if piece.name == piece_name and piece.player == player:
+                    return piece
+            print("Invalid piece.")
+            continue
+
+    def game_over(self) -> bool:
+        """Check whether the player to move has been checkmated or
+        stalemated."""
+        if self.legal_moves():
+            return False
+        if self.in_check():
+            print(self.players[self.side].name.capitalize() +
+                  " has been checkmated!")
+        else:
+            print("Stalemate!")
+        return True
+
+
+def play_chess() -> None:
+    """Play a game of chess."""
+
+    chess_board = GameBoard()
+    chess_board.update_board()
+
+    while not chess_board.game_over():
+        chess_board.move_piece(chess_board.get_piece())
+
+
+if __name__ == '__main__':
+    play_chess()
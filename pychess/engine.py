@@ -0,0 +1,395 @@
+"""An alpha-beta search engine that chooses moves on a chess GameBoard.
+
+The engine searches with negamax alpha-beta and iterative deepening: it
+searches one move deep, then two, and so on until its time runs out, keeping
+the best move of the deepest search it finished. Moves are ordered so the
+best ones are usually searched first: the move remembered in the
+transposition table, then captures by most valuable victim and least
+valuable attacker, then killer moves and finally quiet moves by how often
+they caused cutoffs before. Captures at the end of the search are played out
+by a quiescence search so positions are never scored in the middle of an
+exchange.
+"""
+import time
+from typing import Callable, List, Optional
+
+from .bitboard import EMPTY, PAWN, popcount
+from .book import OpeningBook
+from .chess_game import GameBoard, START_FEN
+from .evaluation import evaluate
+from .moves import Move, CAPTURE, PROMOTION, move_name
+from .tablebase import MAX_PIECES, Tablebases
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+MATE = 100000
+INFINITY = MATE + 1
+MAX_PLY = 128
+
+# How many nodes are searched between checks of the clock. A node takes tens
+# of microseconds, so this overshoots a time limit by a few milliseconds at
+# most.
+_CLOCK_INTERVAL = 128
+
+
+class SearchResult:
+    """The outcome of searching a position.
+
+    === Attributes ===
+    move:
+        The best move found, or -1 if the side to move has no legal moves.
+    score:
+        The score of the position in centipawns, from the point of view of the
+        side to move. Mates are scored MATE less the number of moves to mate.
+    depth:
+        The depth of the deepest search that finished.
+    nodes:
+        The number of positions searched.
+    elapsed:
+        The number of seconds the search took.
+    """
+    move: Move
+    score: int
+    depth: int
+    nodes: int
+    elapsed: float
+
+    def __init__(self, move: Move, score: int, depth: int, nodes: int,
+                 elapsed: float) -> None:
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+
+    @property
+    def nps(self) -> int:
+        """The number of positions searched per second."""
+        return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+    def __str__(self) -> str:
+        move = move_name(self.move) if self.move != -1 else '(none)'
+        return 'depth {} score {} nodes {} nps {} time {:.3f} move {}'.format(
+            self.depth, self.score, self.nodes, self.nps, self.elapsed, move)
+
+
+class Engine:
+    """A chess engine that searches for the best move in a position.
+
+    === Attributes ===
+    table:
+        The transposition table of positions already searched. It is kept
+        between searches, so an engine playing a game reuses its earlier work.
+    book:
+        The opening book played from before searching, or None.
+    tablebases:
+        The endgame tables giving the exact score of positions with few
+        enough pieces, or None.
+    nodes:
+        The number of positions searched by the current search.
+    """
+    table: TranspositionTable
+    book: Optional[OpeningBook]
+    tablebases: Optional[Tablebases]
+    nodes: int
+    _deadline: float
+    _stopped: bool
+    _killers: List[List[Move]]
+    _history: List[int]
+
+    def __init__(self, megabytes: float = 16,
+                 book: Optional[OpeningBook] = None,
+                 tablebases: Optional[Tablebases] = None) -> None:
+        """Create an engine with a transposition table of <megabytes>,
+        playing from <book> while the game is in it and from <tablebases>
+        once it reaches them."""
+        self.table = TranspositionTable(megabytes)
+        self.book = book
+        self.tablebases = tablebases
+        self.nodes = 0
+        self._deadline = 0.0
+        self._stopped = False
+        self._killers = [[0, 0] for _ in range(MAX_PLY)]
+        self._history = [0] * 4096
+
+    def search(self, game: GameBoard, time_limit: float = 1.0,
+               max_depth: int = 64,
+               report: Optional[Callable[[SearchResult], None]] = None,
+               root_moves: Optional[List[Move]] = None) -> SearchResult:
+        """Search the position in <game> for at most <time_limit> seconds or
+        <max_depth> moves deep, and return the best move found. <report>, if
+        given, is called with the result of each depth as it finishes. If
+        <root_moves> is given, only those legal moves are considered;
+        otherwise a move from the opening book or the endgame tables is
+        played without searching if there is one.
+
+        Depth 1 is always searched in full, however short <time_limit> is.
+        If time runs out part way through a deeper search, the best of the
+        moves finished at that depth is played.
+
+        The position in <game> is the same afterwards as before.
+        """
+        start = time.perf_counter()
+        deadline = start + time_limit
+        self._deadline = deadline
+        self._stopped = False
+        self.nodes = 0
+        self._killers = [[0, 0] for _ in range(MAX_PLY)]
+        self._history = [0] * 4096
+        self.table.new_search()
+
+        if self.book is not None and root_moves is None:
+            move = self.book.choose(game)
+            if move is not None:
+                return SearchResult(move, 0, 0, 0,
+                                    time.perf_counter() - start)
+        if self.tablebases is not None and root_moves is None:
+            found = self.tablebases.best_move(game)
+            if found is not None:
+                move, outcome, plies = found
+                return SearchResult(move, outcome * (MATE - plies), 0, 0,
+                                    time.perf_counter() - start)
+        root_moves = list(game.legal_moves() if root_moves is None
+                          else root_moves)
+        if not root_moves:
+            score = -MATE if game.in_check() else 0
+            return SearchResult(-1, score, 0, 0, time.perf_counter() - start)
+
+        result = SearchResult(root_moves[0], 0, 0, 0, 0.0)
+        for depth in range(1, max_depth + 1):
+            if depth > 1 and time.perf_counter() >= deadline:
+                break
+            # Depth 1 always finishes, so the move played has been searched.
+            self._deadline = deadline if depth > 1 else float('inf')
+            score, move = self._search_root(game, root_moves, depth)
+            if self._stopped:
+                if score > -INFINITY:
+                    # The moves finished at this depth include the best of
+                    # the last, searched first, so the best of them is at
+                    # least as good a choice.
+                    result.move = move
+                    result.score = score
+                break
+            result = SearchResult(move, score, depth, self.nodes,
+                                  time.perf_counter() - start)
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if report is not None:
+                report(result)
+            if abs(score) >= MATE - MAX_PLY:
+                break
+
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def _search_root(self, game: GameBoard, moves: List[Move],
+                     depth: int) -> tuple:
+        """Search each of the legal <moves> to <depth> and return the best
+        (score, move). If time runs out, return the best of the moves
+        finished, with a score of -INFINITY if none were."""
+        alpha = -INFINITY
+        best_move = moves[0]
+        for move in moves:
+            if time.perf_counter() >= self._deadline:
+                self._stopped = True
+                break
+            game.make_move(move)
+            score = -self._negamax(game, depth - 1, -INFINITY, -alpha, 1)
+            game.unmake_move()
+            if self._stopped:
+                break
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def _tick(self) -> bool:
+        """Count a node and return whether the search has run out of time."""
+        self.nodes += 1
+        if self.nodes % _CLOCK_INTERVAL == 0 and \
+                time.perf_counter() >= self._deadline:
+            self._stopped = True
+        return self._stopped
+
+    def _negamax(self, game: GameBoard, depth: int, alpha: int, beta: int,
+                 ply: int) -> int:
+        """Return the score of the position in <game> searched <depth> moves
+        deep, or a bound on it outside the window <alpha>, <beta>."""
+        if game.halfmove_clock >= 100 or game.is_repetition():
+            return 0
+        if self.tablebases is not None and \
+                popcount(game.occupancy[2]) <= MAX_PIECES:
+            found = self.tablebases.probe(game)
+            if found is not None:
+                outcome, plies = found
+                return outcome * (MATE - ply - plies)
+        # A position in check is searched a move deeper, so it is only left
+        # to quiescence when not in check.
+        if ply >= MAX_PLY - 1 or depth <= 0 and not game.in_check():
+            return self._quiesce(game, alpha, beta, ply)
+        if self._tick():
+            return 0
+        # Generating the moves finds the checkers too, and caches them for
+        # in_check.
+        moves = game.legal_moves()
+        in_check = game.in_check()
+        if in_check:
+            depth += 1
+
+        key = game.key
+        tt_move = 0
+        entry = self.table.probe(key)
+        if entry is not None:
+            entry_depth, bound, score, tt_move = entry
+            if entry_depth >= depth:
+                score = _score_from_table(score, ply)
+                if bound == EXACT:
+                    return score
+                if bound == LOWER and score >= beta:
+                    return score
+                if bound == UPPER and score <= alpha:
+                    return score
+
+        moves = self._order(game, moves, tt_move, ply)
+        if not moves:
+            return -MATE + ply if in_check else 0
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = 0
+        for move in moves:
+            game.make_move(move)
+            score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if self._stopped:
+                return 0
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not move >> 12 & (CAPTURE | PROMOTION):
+                            killers = self._killers[ply]
+                            if killers[0] != move:
+                                killers[1] = killers[0]
+                                killers[0] = move
+                            self._history[move & 0xFFF] += depth * depth
+                        break
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.store(key, depth, bound, _score_to_table(best_score, ply),
+                         best_move)
+        return best_score
+
+    def _quiesce(self, game: GameBoard, alpha: int, beta: int,
+                 ply: int) -> int:
+        """Return the score of the position in <game> once the captures
+        available in it have been played out."""
+        if self._tick():
+            return 0
+        stand_pat = evaluate(game)
+        if stand_pat >= beta or ply >= MAX_PLY - 1:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        for move in self._order(game, game.legal_moves(captures_only=True), 0,
+                                ply):
+            game.make_move(move)
+            score = -self._quiesce(game, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if self._stopped:
+                return 0
+            if score > alpha:
+                if score >= beta:
+                    return score
+                alpha = score
+        return alpha
+
+    def _order(self, game: GameBoard, moves: List[Move], tt_move: Move,
+               ply: int) -> List[Move]:
+        """Sort <moves> in place so the most promising are searched first,
+        and return them. <moves> is the list legal_moves fills for this ply,
+        which is scratch until the next position at the same ply."""
+        squares = game.squares
+        killers = self._killers[ply]
+        history = self._history
+
+        def priority(move: Move) -> int:
+            if move == tt_move:
+                return 1 << 30
+            flags = move >> 12
+            if flags & CAPTURE:
+                # Most valuable victim, least valuable attacker.
+                victim = squares[move >> 6 & 63]
+                victim_type = PAWN if victim == EMPTY else victim % 6
+                return (1 << 28) + victim_type * 8 - squares[move & 63] % 6
+            if flags & PROMOTION:
+                return (1 << 27) + (flags & 3)
+            if move == killers[0] or move == killers[1]:
+                return 1 << 26
+            return history[move & 0xFFF]
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+
+def _score_to_table(score: int, ply: int) -> int:
+    """Return <score> found <ply> moves from the root as it is stored, with
+    mates counted from the position itself rather than from the root."""
+    if score >= MATE - MAX_PLY:
+        return score + ply
+    if score <= -MATE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def _score_from_table(score: int, ply: int) -> int:
+    """Return a <score> read from the table as seen <ply> moves from the
+    root."""
+    if score >= MATE - MAX_PLY:
+        return score - ply
+    if score <= -MATE + MAX_PLY:
+        return score + ply
+    return score
+
+
+def main() -> None:
+    import argparse
+    from . import stats
+
+    parser = argparse.ArgumentParser(
+        description='Search a position and report each depth.')
+    parser.add_argument('--time', type=float, default=1.0,
+                        help='seconds to search for')
+    parser.add_argument('--depth', type=int, default=64,
+                        help='the deepest search to try')
+    parser.add_argument('--book', default=None,
+                        help='an opening book to play from')
+    parser.add_argument('--tablebases', default=None,
+                        help='a directory of endgame tables to play from')
+    parser.add_argument('--fen', default=START_FEN)
+    stats.add_arguments(parser)
+    args = parser.parse_args()
+
+    book = OpeningBook(args.book) if args.book is not None else None
+    tablebases = Tablebases(args.tablebases) \
+        if args.tablebases is not None else None
+    with stats.measured(args):
+        result = Engine(book=book, tablebases=tablebases).search(
+            GameBoard.from_fen(args.fen), args.time, args.depth, print)
+    if result.move == -1:
+        # The side to move is checkmated or stalemated.
+        print('best move (none), score ' + str(result.score))
+    else:
+        print('best move ' + move_name(result.move) + ', ' +
+              str(result.nps) + ' nodes per second')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Static evaluation of chess positions.
+
+Scores are in centipawns. Each piece is worth its material value plus a bonus
+for the square it stands on, taken from piece-square tables that reward
+central, developed and advanced pieces.
+"""
+from typing import List
+
+from .bitboard import WHITE, squares_of
+from .chess_game import GameBoard
+
+PIECE_VALUES = (100, 320, 330, 500, 900, 0)
+
+# Piece-square tables for white, in the order pawn, knight, bishop, rook,
+# queen, king. Each table is printed with row 7 at the top, as white sees the
+# board from behind its pieces.
+_TABLES = (
+    (0, 0, 0, 0, 0, 0, 0, 0,
+     50, 50, 50, 50, 50, 50, 50, 50,
+     10, 10, 20, 30, 30, 20, 10, 10,
+     5, 5, 10, 25, 25, 10, 5, 5,
+     0, 0, 0, 20, 20, 0, 0, 0,
+     5, -5, -10, 0, 0, -10, -5, 5,
+     5, 10, 10, -20, -20, 10, 10, 5,
+     0, 0, 0, 0, 0, 0, 0, 0),
+    (-50, -40, -30, -30, -30, -30, -40, -50,
+     -40, -20, 0, 0, 0, 0, -20, -40,
+     -30, 0, 10, 15, 15, 10, 0, -30,
+     -30, 5, 15, 20, 20, 15, 5, -30,
+     -30, 0, 15, 20, 20, 15, 0, -30,
+     -30, 5, 10, 15, 15, 10, 5, -30,
+     -40, -20, 0, 5, 5, 0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50),
+    (-20, -10, -10, -10, -10, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 10, 10, 5, 0, -10,
+     -10, 5, 5, 10, 10, 5, 5, -10,
+     -10, 0, 10, 10, 10, 10, 0, -10,
+     -10, 10, 10, 10, 10, 10, 10, -10,
+     -10, 5, 0, 0, 0, 0, 5, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20),
+    (0, 0, 0, 0, 0, 0, 0, 0,
+     5, 10, 10, 10, 10, 10, 10, 5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     0, 0, 0, 5, 5, 0, 0, 0),
+    (-20, -10, -10, -5, -5, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 5, 5, 5, 0, -10,
+     -5, 0, 5, 5, 5, 5, 0, -5,
+     0, 0, 5, 5, 5, 5, 0, -5,
+     -10, 5, 5, 5, 5, 5, 0, -10,
+     -10, 0, 5, 0, 0, 0, 0, -10,
+     -20, -10, -10, -5, -5, -10, -10, -20),
+    (-30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -20, -30, -30, -40, -40, -30, -30, -20,
+     -10, -20, -20, -20, -20, -20, -20, -10,
+     20, 20, 0, 0, 0, 0, 20, 20,
+     20, 30, 10, 0, 0, 10, 30, 20),
+)
+
+
+def _square_scores() -> List[List[int]]:
+    """Return the value of each kind of piece on each square from white's
+    point of view, so black's pieces score negatively."""
+    scores = []
+    for colour in range(2):
+        for piece_type, table in enumerate(_TABLES):
+            kind_scores = []
+            for sq in range(64):
+                # Row 7 is printed first for white; black sees it mirrored.
+                row = 7 - (sq >> 3) if colour == WHITE else sq >> 3
+                value = PIECE_VALUES[piece_type] + table[row * 8 + (sq & 7)]
+                kind_scores.append(value if colour == WHITE else -value)
+            scores.append(kind_scores)
+    return scores
+
+
+# SQUARE_SCORES[kind][sq] is the score of a piece of <kind> on <sq>.
+SQUARE_SCORES = _square_scores()
+
+
+def evaluate(game: GameBoard) -> int:
+    """Return the score of the position in <game> from the point of view of
+    the side to move."""
+    squares = game.squares
+    score = 0
+    for sq in squares_of(game.occupancy[2]):
+        score += SQUARE_SCORES[squares[sq]][sq]
+    return score if game.side == WHITE else -score
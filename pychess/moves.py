@@ -0,0 +1,89 @@
+"""Compact move encoding for the chess GameBoard.
+
+A move is a plain int, so move lists stay small and cheap to build:
+
+    bits 0-5    the square the piece moves from
+    bits 6-11   the square the piece moves to
+    bits 12-15  flags saying what kind of move it is
+
+The capture flag is a single bit, as is the promotion flag, and a promotion
+keeps the type of piece the pawn becomes in its two lowest flag bits.
+"""
+from typing import List
+
+from .bitboard import KNIGHT, SQUARE_NAMES
+
+Move = int
+
+QUIET = 0
+DOUBLE_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EN_PASSANT = 5
+PROMOTION = 8
+
+# The letters naming promotions, indexed by the two lowest flag bits.
+PROMOTION_LETTERS = 'nbrq'
+
+
+def encode_move(start: int, stop: int, flags: int = QUIET) -> Move:
+    """Return the move of a piece from square <start> to square <stop>."""
+    return start | stop << 6 | flags << 12
+
+
+def move_from(move: Move) -> int:
+    """Return the square <move> starts on."""
+    return move & 63
+
+
+def move_to(move: Move) -> int:
+    """Return the square <move> ends on."""
+    return move >> 6 & 63
+
+
+def move_flags(move: Move) -> int:
+    """Return the flags of <move>."""
+    return move >> 12
+
+
+def is_capture(move: Move) -> bool:
+    """Return whether <move> captures a piece."""
+    return bool(move >> 12 & CAPTURE)
+
+
+def move_promotion(move: Move) -> int:
+    """Return the type of piece <move> promotes a pawn to, or -1 if it is not
+    a promotion."""
+    flags = move >> 12
+    if flags & PROMOTION:
+        return KNIGHT + (flags & 3)
+    return -1
+
+
+def move_name(move: Move) -> str:
+    """Return <move> as its start and stop squares, followed by the letter of
+    the promotion piece if there is one, e.g. 'e2e4' or 'b7b8q'."""
+    name = SQUARE_NAMES[move & 63] + SQUARE_NAMES[move >> 6 & 63]
+    if move >> 12 & PROMOTION:
+        name += PROMOTION_LETTERS[move >> 12 & 3]
+    return name
+
+
+def move_squares(move: Move) -> List[int]:
+    """Return every square whose contents <move> changes: the squares it
+    starts and ends on, the square of a pawn taken en passant and the
+    squares of a rook moved by castling."""
+    start = move & 63
+    stop = move >> 6 & 63
+    flags = move >> 12
+    squares = [start, stop]
+    if flags == EN_PASSANT:
+        # A white pawn takes en passant onto row 5, a black pawn onto row 2,
+        # and the pawn taken is just behind.
+        squares.append(stop - 8 if stop >> 3 == 5 else stop + 8)
+    elif flags == KING_CASTLE:
+        squares += [stop + 1, stop - 1]
+    elif flags == QUEEN_CASTLE:
+        squares += [stop - 2, stop + 1]
+    return squares
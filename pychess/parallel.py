@@ -0,0 +1,165 @@
+"""Searching and counting perft across several processes.
+
+Python runs one thread of bytecode at a time, so a single search only ever
+uses one core. WorkerPool splits the moves of the root position between
+worker processes instead. Positions are sent to workers in the compact form
+GameBoard pickles to, and the results are merged in the order of the root
+moves, so the same results from the workers always merge to the same answer.
+
+Usage:
+    python -m pychess.parallel perft 5 [--fen FEN] [--processes N]
+    python -m pychess.parallel search [--time SECONDS] [--fen FEN]
+        [--processes N]
+"""
+import os
+import time
+from multiprocessing.pool import Pool
+from typing import List, Optional
+
+from .chess_game import GameBoard, START_FEN
+from .engine import MATE, MAX_PLY, Engine, SearchResult
+from .moves import move_name
+from .perft import perft
+
+# The engine of each worker process, kept between searches so its
+# transposition table is reused.
+_engine = None
+
+
+def _start_worker(megabytes: float) -> None:
+    """Create the engine of a new worker process."""
+    global _engine
+    _engine = Engine(megabytes)
+
+
+def _divide_task(task: tuple) -> tuple:
+    """Return the name of a root move and the perft count below it."""
+    game, move, depth = task
+    game.make_move(move)
+    return move_name(move), perft(game, depth - 1)
+
+
+def _search_task(task: tuple) -> tuple:
+    """Search a position with only some of its root moves, and return the
+    final result with the result of every depth finished, shallowest
+    first."""
+    game, moves, time_limit, max_depth = task
+    finished = []
+    result = _engine.search(game, time_limit, max_depth, finished.append,
+                            root_moves=moves)
+    return result, finished
+
+
+class WorkerPool:
+    """A pool of worker processes that share out the root moves of perft
+    counts and searches.
+
+    === Attributes ===
+    processes:
+        The number of worker processes.
+    """
+    processes: int
+    _pool: Pool
+
+    def __init__(self, processes: Optional[int] = None,
+                 megabytes: float = 16) -> None:
+        """Start <processes> workers, one per core if not given, each with a
+        transposition table of <megabytes>."""
+        self.processes = processes or os.cpu_count() or 1
+        self._pool = Pool(self.processes, _start_worker, (megabytes,))
+
+    def __enter__(self) -> 'WorkerPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self._pool.close()
+        self._pool.join()
+
+    def divide(self, game: GameBoard, depth: int) -> List[tuple]:
+        """Return the (move name, count) pairs of perft.divide, counting
+        below each root move in a worker."""
+        tasks = [(game, move, depth) for move in game.legal_moves()]
+        return sorted(self._pool.map(_divide_task, tasks, chunksize=1))
+
+    def perft(self, game: GameBoard, depth: int) -> int:
+        """Return the perft count of <depth> from the position in <game>."""
+        if depth <= 1:
+            return perft(game, depth)
+        return sum(nodes for _, nodes in self.divide(game, depth))
+
+    def search(self, game: GameBoard, time_limit: float = 1.0,
+               max_depth: int = 64) -> SearchResult:
+        """Search the position in <game> like Engine.search, with the root
+        moves dealt out between the workers.
+
+        Workers finish different depths in the same time, and a score from
+        a shallower search can't be weighed against a deeper one, so the
+        workers' best moves are compared at the deepest depth all of them
+        finished. A worker that stopped early on finding a mate counts as
+        having finished every depth with it. The best score wins, ties going
+        to the root move generated first.
+        """
+        start = time.perf_counter()
+        moves = game.legal_moves()
+        if not moves:
+            return SearchResult(-1, -MATE if game.in_check() else 0, 0, 0,
+                                time.perf_counter() - start)
+        groups = [moves[i::self.processes] for i in range(self.processes)]
+        groups = [group for group in groups if group]
+        outcomes = self._pool.map(
+            _search_task,
+            [(game, group, time_limit, max_depth) for group in groups],
+            chunksize=1)
+        nodes = sum(result.nodes for result, _ in outcomes)
+
+        finished = [depths for _, depths in outcomes if depths]
+        if not finished:
+            # No worker finished even one depth.
+            return SearchResult(moves[0], 0, 0, nodes,
+                                time.perf_counter() - start)
+        depth = min((depths[-1].depth for depths in finished
+                     if abs(depths[-1].score) < MATE - MAX_PLY),
+                    default=max(depths[-1].depth for depths in finished))
+        order = {move: i for i, move in enumerate(moves)}
+        best = None
+        for depths in finished:
+            result = depths[min(depth, len(depths)) - 1]
+            if best is None or result.score > best.score or (
+                    result.score == best.score and
+                    order[result.move] < order[best.move]):
+                best = result
+        return SearchResult(best.move, best.score, depth, nodes,
+                            time.perf_counter() - start)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Count perft or search on every core.')
+    parser.add_argument('command', choices=['perft', 'search'])
+    parser.add_argument('depth', type=int, nargs='?', default=4)
+    parser.add_argument('--fen', default=START_FEN)
+    parser.add_argument('--time', type=float, default=1.0,
+                        help='seconds to search for')
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    game = GameBoard.from_fen(args.fen)
+    with WorkerPool(args.processes) as pool:
+        start = time.perf_counter()
+        if args.command == 'perft':
+            nodes = pool.perft(game, args.depth)
+            seconds = time.perf_counter() - start
+            print('{} nodes in {:.3f}s on {} processes, {} nps'.format(
+                nodes, seconds, pool.processes, int(nodes / seconds)))
+        else:
+            print(pool.search(game, args.time))
+
+
+if __name__ == '__main__':
+    main()
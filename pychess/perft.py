@@ -0,0 +1,287 @@
+"""Perft: counting every position reachable in a number of moves.
+
+Comparing perft counts with the published counts for well-known positions is
+the standard test that move generation is correct, including castling,
+en passant, promotions and moves out of check. Timing the same counts gives a
+benchmark of move generation speed that can be compared between runs.
+
+Usage:
+    python -m pychess.perft divide 3 [--fen FEN]
+    python -m pychess.perft check [--max-nodes N]
+    python -m pychess.perft bench [--max-nodes N] [--output FILE]
+        [--compare FILE]
+    python -m pychess.perft memory [--games N]
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import List, Optional, Sequence
+
+from .chess_game import GameBoard, START_FEN
+from .moves import move_name
+
+# Well-known test positions, with the published number of positions reachable
+# from each in 1, 2, 3... moves.
+REFERENCE_POSITIONS = [
+    ('start', START_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete',
+     'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039, 97862, 4085603]),
+    ('position 3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     [14, 191, 2812, 43238, 674624]),
+    ('position 4',
+     'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     [6, 264, 9467, 422333]),
+    ('position 5',
+     'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     [44, 1486, 62379, 2103487]),
+    ('position 6',
+     'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     [46, 2079, 89890, 3894594]),
+]
+
+
+# The modules whose import is timed by the benchmark: the package on its own,
+# the rules, what an engine worker process loads and what the server loads.
+IMPORT_MODULES = ('pychess', 'pychess.chess_game', 'pychess.engine',
+                  'pychess.server')
+
+# Run in a new interpreter to time one import and see what it brought in.
+_IMPORT_SCRIPT = '''import sys, time
+start = time.perf_counter()
+import {}
+print(time.perf_counter() - start, 'pygame' in sys.modules)
+'''
+
+
+def perft(game: GameBoard, depth: int) -> int:
+    """Return the number of positions reachable from the position in <game>
+    in exactly <depth> moves."""
+    if depth == 0:
+        return 1
+    moves = game.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        game.make_move(move)
+        nodes += perft(game, depth - 1)
+        game.unmake_move()
+    return nodes
+
+
+def divide(game: GameBoard, depth: int) -> List[tuple]:
+    """Return a (move name, count) pair for each legal move in <game>, where
+    count is the perft count of <depth> - 1 after that move. Comparing these
+    with another move generator narrows a wrong count down to one move."""
+    counts = []
+    for move in game.legal_moves():
+        game.make_move(move)
+        counts.append((move_name(move), perft(game, depth - 1)))
+        game.unmake_move()
+    return sorted(counts)
+
+
+def _runs(max_nodes: int) -> List[tuple]:
+    """Return the (name, fen, depth, expected count) of every reference count
+    no larger than <max_nodes>."""
+    runs = []
+    for name, fen, counts in REFERENCE_POSITIONS:
+        for depth, expected in enumerate(counts, 1):
+            if expected <= max_nodes:
+                runs.append((name, fen, depth, expected))
+    return runs
+
+
+def check(max_nodes: int) -> bool:
+    """Compare perft with every reference count no larger than <max_nodes>,
+    print the outcome of each and return whether they all matched."""
+    passed = True
+    for name, fen, depth, expected in _runs(max_nodes):
+        nodes = perft(GameBoard.from_fen(fen), depth)
+        status = 'ok' if nodes == expected else 'FAILED'
+        print('{:<12} depth {}  {:>9} (expected {:>9})  {}'.format(
+            name, depth, nodes, expected, status))
+        passed = passed and nodes == expected
+    return passed
+
+
+def import_times(modules: Sequence[str] = IMPORT_MODULES,
+                 repeat: int = 5) -> List[dict]:
+    """Return the fastest of <repeat> times taken to import each of
+    <modules> in a new interpreter, and whether importing it loaded pygame."""
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(
+        path for path in (root, env.get('PYTHONPATH')) if path)
+    results = []
+    for module in modules:
+        seconds = float('inf')
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, '-c', _IMPORT_SCRIPT.format(module)],
+                env=env, stdout=subprocess.PIPE, check=True,
+                universal_newlines=True).stdout.split()
+            seconds = min(seconds, float(output[0]))
+        results.append({'module': module, 'seconds': seconds,
+                        'pygame': output[1] == 'True'})
+    return results
+
+
+def _traced_blocks() -> int:
+    """Return the number of memory blocks tracemalloc is tracing, leaving
+    out its own."""
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)])
+    return sum(stat.count for stat in snapshot.statistics('filename'))
+
+
+def memory_usage(games: int = 1000) -> dict:
+    """Return the bytes held by each of <games> new GameBoards and the memory
+    blocks allocated per move by the object API, measured with tracemalloc.
+
+    Blocks are counted over every legal move in the reference positions:
+    making the move, reading the board and the legal moves after it, and
+    taking it back, keeping every board read so what it allocated stays
+    counted. Each position is played through once before counting, so only
+    what every move allocates is counted, not what the first does.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        boards = [GameBoard() for _ in range(games)]
+        game_bytes = (tracemalloc.get_traced_memory()[0] - before) / games
+        del boards
+
+        views = []
+        moves = 0
+        blocks = 0
+        for _, fen, _ in REFERENCE_POSITIONS:
+            game = GameBoard.from_fen(fen)
+            for counting in (False, True):
+                before = _traced_blocks()
+                for move in game.legal_moves():
+                    game.make_move(move)
+                    views.append(game.board)
+                    game.legal_moves()
+                    game.unmake_move()
+                if counting:
+                    blocks += _traced_blocks() - before
+                    moves += len(game.legal_moves())
+    finally:
+        tracemalloc.stop()
+    return {'bytes_per_game': game_bytes, 'blocks_per_move': blocks / moves}
+
+
+def benchmark(max_nodes: int, output: str,
+              compare: Optional[str] = None) -> dict:
+    """Time perft for every reference count no larger than <max_nodes>, and
+    the import of each of IMPORT_MODULES, measure memory_usage, write the
+    nodes per second of each count, the import times and the memory used to
+    the JSON file <output> and return what was written. If <compare> names
+    the output of an earlier run, print how each has changed since."""
+    results = []
+    for name, fen, depth, expected in _runs(max_nodes):
+        game = GameBoard.from_fen(fen)
+        start = time.perf_counter()
+        nodes = perft(game, depth)
+        seconds = time.perf_counter() - start
+        results.append({'position': name, 'depth': depth, 'nodes': nodes,
+                        'correct': nodes == expected, 'seconds': seconds,
+                        'nps': int(nodes / seconds) if seconds > 0 else 0})
+        print('{:<12} depth {}  {:>9} nodes  {:>8.3f}s  {:>9} nps'.format(
+            name, depth, nodes, seconds, results[-1]['nps']))
+
+    imports = import_times()
+    for result in imports:
+        print('import {:<20} {:>8.1f}ms{}'.format(
+            result['module'], result['seconds'] * 1000,
+            '  (loads pygame)' if result['pygame'] else ''))
+    memory = memory_usage()
+    _print_memory(memory)
+
+    report = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'python': platform.python_version(),
+              'machine': platform.machine(),
+              'results': results,
+              'imports': imports,
+              'memory': memory}
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    if compare is not None:
+        with open(compare) as file:
+            earlier = json.load(file)
+        previous = {(result['position'], result['depth']): result['nps']
+                    for result in earlier['results']}
+        for result in results:
+            before = previous.get((result['position'], result['depth']))
+            if before:
+                print('{:<12} depth {}  {:.2f}x'.format(
+                    result['position'], result['depth'],
+                    result['nps'] / before))
+        # Runs from before import times were recorded have none to compare.
+        previous = {result['module']: result['seconds']
+                    for result in earlier.get('imports', [])}
+        for result in imports:
+            before = previous.get(result['module'])
+            if before:
+                print('import {:<20} {:.2f}x'.format(
+                    result['module'], result['seconds'] / before))
+        for name, value in earlier.get('memory', {}).items():
+            if value:
+                print('{:<27} {:.2f}x'.format(name, memory[name] / value))
+    return report
+
+
+def _print_memory(memory: dict) -> None:
+    """Print the results of memory_usage."""
+    print('{:.0f} bytes per GameBoard, {:.1f} blocks allocated per move'
+          .format(memory['bytes_per_game'], memory['blocks_per_move']))
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Count and time perft.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    divide_parser = commands.add_parser(
+        'divide', help='print the perft count after each legal move')
+    divide_parser.add_argument('depth', type=int)
+    divide_parser.add_argument('--fen', default=START_FEN)
+    check_parser = commands.add_parser(
+        'check', help='compare perft with the published counts')
+    check_parser.add_argument('--max-nodes', type=int, default=200000)
+    bench_parser = commands.add_parser(
+        'bench', help='time perft and record nodes per second as JSON')
+    bench_parser.add_argument('--max-nodes', type=int, default=200000)
+    bench_parser.add_argument('--output', default='perft_bench.json')
+    bench_parser.add_argument('--compare', default=None,
+                              help='an earlier output file to compare with')
+    memory_parser = commands.add_parser(
+        'memory', help='measure the memory used by games and moves')
+    memory_parser.add_argument('--games', type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.command == 'divide':
+        total = 0
+        for name, nodes in divide(GameBoard.from_fen(args.fen), args.depth):
+            print(name + ': ' + str(nodes))
+            total += nodes
+        print('total: ' + str(total))
+    elif args.command == 'check':
+        if not check(args.max_nodes):
+            raise SystemExit(1)
+    elif args.command == 'memory':
+        _print_memory(memory_usage(args.games))
+    else:
+        benchmark(args.max_nodes, args.output, args.compare)
+
+
+if __name__ == '__main__':
+    main()
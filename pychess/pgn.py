@@ -0,0 +1,379 @@
+"""Reading and writing games in Portable Game Notation (PGN).
+
+read_games is a generator: it reads a PGN file a line at a time and yields
+each game as soon as its last move has been read, so files of any size are
+read in the memory of a single game. Moves are read from standard algebraic
+notation (SAN) by looking up which pieces can reach the destination square in
+the attack tables, rather than by generating every legal move of every
+position.
+
+Usage:
+    python -m pychess.pgn bench FILE     (FILE may be gzip-compressed)
+"""
+import gzip
+import re
+import time
+from typing import Dict, IO, Iterable, Iterator, List, Optional
+
+from .bitboard import (WHITE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, EMPTY,
+                       SQUARE_NAMES, FILE_NAMES, KNIGHT_ATTACKS, KING_ATTACKS,
+                       bishop_attacks, rook_attacks, queen_attacks, squares_of)
+from .chess_game import GameBoard
+from .moves import (Move, QUIET, DOUBLE_PUSH, KING_CASTLE, QUEEN_CASTLE,
+                    CAPTURE, EN_PASSANT, PROMOTION)
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+# The tags every PGN game has, in the order they are written.
+SEVEN_TAG_ROSTER = (('Event', '?'), ('Site', '?'), ('Date', '????.??.??'),
+                    ('Round', '?'), ('White', '?'), ('Black', '?'),
+                    ('Result', '*'))
+
+SAN_LETTERS = 'PNBRQK'
+SQUARE_INDEX = {name: sq for sq, name in enumerate(SQUARE_NAMES)}
+
+_SAN = re.compile(r'([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+_TAG = re.compile(r'\[\s*(\w+)\s+"(.*)"\s*\]')
+_TOKEN = re.compile(r'[{}();]|[^\s{}();]+')
+_MOVE_NUMBER = re.compile(r'\d+\.+')
+
+
+class Game:
+    """A game of chess as recorded in PGN.
+
+    === Attributes ===
+    headers:
+        The tag pairs of the game, in the order they were read.
+    moves:
+        The moves played, encoded as in moves.py.
+    result:
+        '1-0', '0-1', '1/2-1/2' or '*' if the game is unfinished.
+    error:
+        None, or why the moves stop short of the end of the game when a move
+        could not be read.
+    """
+    headers: Dict[str, str]
+    moves: List[Move]
+    result: str
+    error: Optional[str]
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None,
+                 moves: Optional[List[Move]] = None,
+                 result: str = '*') -> None:
+        self.headers = headers if headers is not None else {}
+        self.moves = moves if moves is not None else []
+        self.result = result
+        self.error = None
+
+    def start(self) -> GameBoard:
+        """Return a game board in the position the game started from."""
+        if 'FEN' in self.headers:
+            return GameBoard.from_fen(self.headers['FEN'])
+        return GameBoard()
+
+    def board(self) -> GameBoard:
+        """Return a game board in the position at the end of the game."""
+        game = self.start()
+        for move in self.moves:
+            game.make_move(move)
+        return game
+
+
+def _is_legal(game: GameBoard, move: Move) -> bool:
+    """Return whether pseudo-legal <move> doesn't leave the mover in check."""
+    side = game.side
+    game.make_move(move)
+    legal = not game.in_check(side)
+    game.unmake_move()
+    return legal
+
+
+def parse_san(game: GameBoard, text: str) -> Move:
+    """Return the legal move written <text> in SAN in the position in <game>.
+    Raise ValueError if <text> isn't exactly one legal move."""
+    san_text = text.rstrip('+#!?')
+    side = game.side
+    squares = game.squares
+    if san_text in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        king = 56 * side + 4
+        if len(san_text) == 3:
+            move = king | (king + 2) << 6 | KING_CASTLE << 12
+        else:
+            move = king | (king - 2) << 6 | QUEEN_CASTLE << 12
+        if move in game.legal_moves():
+            return move
+        raise ValueError('Illegal move: ' + text)
+
+    match = _SAN.match(san_text)
+    if match is None:
+        raise ValueError('Unreadable move: ' + text)
+    letter, from_file, from_row, stop_name, promotion = match.groups()
+    piece_type = SAN_LETTERS.index(letter) if letter else PAWN
+    stop = SQUARE_INDEX[stop_name]
+    kind = side * 6 + piece_type
+    bitboards = game.bitboards
+    occupied = game.occupancy[2]
+    target = squares[stop]
+    if target != EMPTY and target // 6 == side:
+        raise ValueError('Illegal move: ' + text)
+    flags = QUIET if target == EMPTY else CAPTURE
+
+    if piece_type == PAWN:
+        forward = 8 if side == WHITE else -8
+        if not 0 <= stop - forward < 64:
+            # No pawn can reach its own back row.
+            raise ValueError('Illegal move: ' + text)
+        if from_file is not None and FILE_NAMES.index(from_file) != stop & 7:
+            if abs(FILE_NAMES.index(from_file) - (stop & 7)) != 1:
+                raise ValueError('Illegal move: ' + text)
+            starts = 1 << stop - forward + FILE_NAMES.index(from_file) - \
+                (stop & 7)
+            if stop == game.ep_square:
+                flags = EN_PASSANT
+            elif target == EMPTY:
+                raise ValueError('Illegal move: ' + text)
+        elif target != EMPTY:
+            raise ValueError('Illegal move: ' + text)
+        elif squares[stop - forward] == kind:
+            starts = 1 << stop - forward
+        elif squares[stop - forward] == EMPTY and \
+                0 <= stop - 2 * forward < 64 and \
+                squares[stop - 2 * forward] == kind and \
+                stop >> 3 == 3 + side:
+            starts = 1 << stop - 2 * forward
+            flags = DOUBLE_PUSH
+        else:
+            raise ValueError('Illegal move: ' + text)
+        starts &= bitboards[kind]
+        if promotion is not None:
+            if stop >> 3 != 7 * (1 - side):
+                raise ValueError('Illegal move: ' + text)
+            flags |= PROMOTION | SAN_LETTERS.index(promotion) - KNIGHT
+        elif stop >> 3 == 7 * (1 - side):
+            raise ValueError('Promotion piece missing: ' + text)
+    elif piece_type == KNIGHT:
+        starts = KNIGHT_ATTACKS[stop] & bitboards[kind]
+    elif piece_type == BISHOP:
+        starts = bishop_attacks(stop, occupied) & bitboards[kind]
+    elif piece_type == ROOK:
+        starts = rook_attacks(stop, occupied) & bitboards[kind]
+    elif piece_type == QUEEN:
+        starts = queen_attacks(stop, occupied) & bitboards[kind]
+    else:
+        starts = KING_ATTACKS[stop] & bitboards[kind]
+
+    candidates = []
+    for start in squares_of(starts):
+        if from_file is not None and FILE_NAMES[start & 7] != from_file:
+            continue
+        if from_row is not None and str((start >> 3) + 1) != from_row:
+            continue
+        move = start | stop << 6 | flags << 12
+        if _is_legal(game, move):
+            candidates.append(move)
+    if len(candidates) != 1:
+        raise ValueError(('Ambiguous move: ' if candidates
+                          else 'Illegal move: ') + text)
+    return candidates[0]
+
+
+def san(game: GameBoard, move: Move) -> str:
+    """Return legal <move> in the position in <game> written in SAN."""
+    start = move & 63
+    stop = move >> 6 & 63
+    flags = move >> 12
+    if flags == KING_CASTLE:
+        text = 'O-O'
+    elif flags == QUEEN_CASTLE:
+        text = 'O-O-O'
+    else:
+        kind = game.squares[start]
+        piece_type = kind % 6
+        if piece_type == PAWN:
+            text = FILE_NAMES[start & 7] + 'x' if flags & CAPTURE else ''
+            text += SQUARE_NAMES[stop]
+            if flags & PROMOTION:
+                text += '=' + SAN_LETTERS[KNIGHT + (flags & 3)]
+        else:
+            others = [other & 63 for other in game.legal_moves()
+                      if other >> 6 & 63 == stop and other & 63 != start and
+                      game.squares[other & 63] == kind]
+            text = SAN_LETTERS[piece_type]
+            if others:
+                if all(other & 7 != start & 7 for other in others):
+                    text += FILE_NAMES[start & 7]
+                elif all(other >> 3 != start >> 3 for other in others):
+                    text += SQUARE_NAMES[start][1]
+                else:
+                    text += SQUARE_NAMES[start]
+            if flags & CAPTURE:
+                text += 'x'
+            text += SQUARE_NAMES[stop]
+
+    game.make_move(move)
+    if game.in_check():
+        text += '#' if not game.legal_moves() else '+'
+    game.unmake_move()
+    return text
+
+
+def open_pgn(path: str, mode: str = 'r') -> IO[str]:
+    """Open the PGN file at <path> as text, decompressing or compressing it
+    with gzip if its name ends in '.gz'."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', errors='replace')
+    return open(path, mode, encoding='utf-8', errors='replace')
+
+
+def read_games(lines: Iterable[str]) -> Iterator[Game]:
+    """Yield each game in the PGN text <lines>, with its moves replayed.
+
+    Comments, variations and numeric annotations are skipped. A game with a
+    move that cannot be read, or a FEN header that can't be set up, is still
+    yielded, with the moves before the error and its error set, and reading
+    carries on with the next game.
+    """
+    game = None
+    board = None
+    in_comment = False
+    variation_depth = 0
+
+    for line in lines:
+        if not in_comment and line.startswith('['):
+            match = _TAG.match(line)
+            if match is not None:
+                if board is not None or \
+                        game is not None and game.error is not None:
+                    yield game
+                    game = board = None
+                if game is None:
+                    game = Game()
+                game.headers[match.group(1)] = match.group(2)
+                continue
+        if line.startswith('%'):
+            continue
+
+        for token in _TOKEN.findall(line):
+            if in_comment:
+                if token == '}':
+                    in_comment = False
+                continue
+            if token == '{':
+                in_comment = True
+            elif token == ';':
+                break
+            elif token == '(':
+                variation_depth += 1
+            elif token == ')':
+                variation_depth = max(variation_depth - 1, 0)
+            elif variation_depth or token[0] == '$':
+                continue
+            elif token in RESULTS:
+                if game is None:
+                    game = Game()
+                game.result = token
+                if board is None and game.error is None:
+                    # A game with no moves still has its FEN checked.
+                    try:
+                        game.start()
+                    except ValueError as error:
+                        game.error = str(error)
+                yield game
+                game = board = None
+            else:
+                token = _MOVE_NUMBER.sub('', token, 1)
+                if not token:
+                    continue
+                if game is None:
+                    game = Game()
+                if game.error is not None:
+                    continue
+                # A bad FEN header or move ends the game, not the reading.
+                try:
+                    if board is None:
+                        board = game.start()
+                    move = parse_san(board, token)
+                    board.make_move(move)
+                except (ValueError, IndexError) as error:
+                    game.error = str(error)
+                    continue
+                game.moves.append(move)
+
+    if game is not None and (board is not None or game.headers or
+                             game.error is not None):
+        yield game
+
+
+def format_game(game: Game) -> str:
+    """Return <game> written as PGN, ending with a blank line."""
+    headers = dict(game.headers)
+    headers['Result'] = game.result
+    lines = []
+    for tag, default in SEVEN_TAG_ROSTER:
+        lines.append('[{} "{}"]'.format(tag, headers.pop(tag, default)))
+    for tag, value in headers.items():
+        lines.append('[{} "{}"]'.format(tag, value))
+    lines.append('')
+
+    board = game.start()
+    tokens = []
+    for move in game.moves:
+        if board.side == WHITE:
+            tokens.append(str((board.turn + 1) // 2) + '.')
+        elif not tokens:
+            tokens.append(str((board.turn + 1) // 2) + '...')
+        tokens.append(san(board, move))
+        board.make_move(move)
+    tokens.append(game.result)
+
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 79:
+            lines.append(line)
+            line = token
+        else:
+            line = line + ' ' + token if line else token
+    lines.append(line)
+    return '\n'.join(lines) + '\n\n'
+
+
+def write_games(file: IO[str], games: Iterable[Game]) -> int:
+    """Write each of <games> to <file> as PGN and return how many there were.
+    """
+    count = 0
+    for game in games:
+        file.write(format_game(game))
+        count += 1
+    return count
+
+
+def benchmark(path: str) -> None:
+    """Read every game in the PGN file at <path> and print how many games and
+    moves were read per second."""
+    games = moves = errors = 0
+    start = time.perf_counter()
+    with open_pgn(path) as file:
+        for game in read_games(file):
+            games += 1
+            moves += len(game.moves)
+            errors += game.error is not None
+    seconds = time.perf_counter() - start
+    print('{} games ({} with errors), {} moves in {:.2f}s'.format(
+        games, errors, moves, seconds))
+    if seconds > 0:
+        print('{:.1f} games per second, {:.0f} moves per second'.format(
+            games / seconds, moves / seconds))
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Read PGN files.')
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('path')
+    args = parser.parse_args()
+    benchmark(args.path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""A compact record of a game that can be moved through quickly.
+
+Each move is kept as its 16-bit code in an array('H'), two bytes a move, and
+every <interval> plies the position is kept too, packed by GameBoard.encode
+into POSITION_BYTES bytes. Going to any ply starts from the nearest position
+kept before it, or from where the record already is if that is nearer, so it
+costs at most <interval> moves however long the game is, and stepping one
+ply forward or back costs one move.
+
+Usage:
+    python -m pychess.record bench [--plies N] [--interval K] [--seeks N]
+        [--seed SEED]
+"""
+import random
+import time
+from array import array
+from typing import Iterable, Optional
+
+from .chess_game import GameBoard, POSITION_BYTES
+from .moves import Move, CAPTURE
+from .pgn import Game
+
+# The plies between positions kept, trading memory for how far a seek can
+# have to play.
+SNAPSHOT_INTERVAL = 16
+
+
+class GameRecord:
+    """The moves of a game and a position every few plies, with a board that
+    can be moved to any ply of it.
+
+    === Attributes ===
+    moves:
+        Every move of the game, as 16-bit codes.
+    interval:
+        The plies between positions kept.
+    ply:
+        The number of moves played on board.
+    """
+    moves: array
+    interval: int
+    ply: int
+    _snapshots: bytearray
+    _board: GameBoard
+    _base: int
+
+    def __init__(self, start: Optional[GameBoard] = None,
+                 moves: Iterable[Move] = (),
+                 interval: int = SNAPSHOT_INTERVAL) -> None:
+        """Record a game starting from the position in <start>, or the usual
+        starting position, with <moves> played from it and a position kept
+        every <interval> plies. <start> is copied, not changed."""
+        if interval < 1:
+            raise ValueError('The snapshot interval must be at least 1')
+        if start is None:
+            start = GameBoard()
+        self.moves = array('H')
+        self.interval = interval
+        self.ply = 0
+        self._snapshots = bytearray(start.encode())
+        self._board = GameBoard.decode(self._snapshots)
+        # The ply of the position self._board was decoded from, so the moves
+        # it can take back are those played since.
+        self._base = 0
+        for move in moves:
+            self.append(move)
+
+    @classmethod
+    def from_game(cls, game: Game,
+                  interval: int = SNAPSHOT_INTERVAL) -> 'GameRecord':
+        """Return the record of a game read from PGN."""
+        return cls(game.start(), game.moves, interval)
+
+    def __len__(self) -> int:
+        """Return the number of moves in the game."""
+        return len(self.moves)
+
+    @property
+    def board(self) -> GameBoard:
+        """The position after the first <ply> moves. Moving the record may
+        replace it with a new GameBoard, and it must not be changed except
+        through the record."""
+        return self._board
+
+    @property
+    def nbytes(self) -> int:
+        """The bytes taken by the moves and positions kept."""
+        return self.moves.itemsize * len(self.moves) + len(self._snapshots)
+
+    def append(self, move: Move) -> None:
+        """Play <move> in the position at <ply>, which becomes the last move
+        of the game: any moves that came after it are dropped."""
+        if self.ply < len(self.moves):
+            del self.moves[self.ply:]
+            kept = self.ply // self.interval + 1
+            del self._snapshots[kept * POSITION_BYTES:]
+        self._board.make_move(move)
+        self.moves.append(move)
+        self.ply += 1
+        if self.ply % self.interval == 0:
+            self._snapshots += self._board.encode()
+
+    def seek(self, ply: int) -> GameBoard:
+        """Move to the position after the first <ply> moves and return it.
+        Raise ValueError if the game has no such ply."""
+        if not 0 <= ply <= len(self.moves):
+            raise ValueError('No ply {} in a game of {} moves'.format(
+                ply, len(self.moves)))
+        board = self._board
+        snapshot = ply // self.interval * self.interval
+        if self._base <= ply < self.ply and self.ply - ply <= ply - snapshot:
+            # Taking moves back is nearer than the position kept before.
+            while self.ply > ply:
+                board.unmake_move()
+                self.ply -= 1
+            return board
+        if not snapshot <= self.ply <= ply:
+            start = snapshot // self.interval * POSITION_BYTES
+            self._board = board = GameBoard.decode(
+                bytes(self._snapshots[start:start + POSITION_BYTES]))
+            self._base = self.ply = snapshot
+        moves = self.moves
+        while self.ply < ply:
+            board.make_move(moves[self.ply])
+            self.ply += 1
+        return board
+
+    def forward(self) -> Optional[Move]:
+        """Play the next move and return it, or return None at the end of the
+        game."""
+        if self.ply == len(self.moves):
+            return None
+        move = self.moves[self.ply]
+        self.seek(self.ply + 1)
+        return move
+
+    def backward(self) -> Optional[Move]:
+        """Take back the last move played and return it, or return None at
+        the start of the game."""
+        if self.ply == 0:
+            return None
+        move = self.moves[self.ply - 1]
+        self.seek(self.ply - 1)
+        return move
+
+
+def random_game(plies: int, rng: random.Random) -> GameRecord:
+    """Return the record of a game of <plies> random legal moves. Captures are
+    only played when nothing else can be, so the game lasts, and whenever it
+    ends it is taken back to before its last capture or pawn move and played
+    on differently."""
+    record = GameRecord()
+    while len(record) < plies:
+        board = record.board
+        legal = board.legal_moves()
+        if not legal or board.halfmove_clock >= 100:
+            record.seek(max(record.ply - board.halfmove_clock -
+                            rng.randint(1, 10), 0))
+            continue
+        quiet = [move for move in legal if not move >> 12 & CAPTURE]
+        record.append(rng.choice(quiet or legal))
+    return record
+
+
+def benchmark(plies: int = 2000, interval: int = SNAPSHOT_INTERVAL,
+              seeks: int = 1000, seed: int = 0) -> None:
+    """Time <seeks> seeks to random plies of a random game of <plies> moves,
+    against replaying the game from its start for each, and print both."""
+    rng = random.Random(seed)
+    record = random_game(plies, rng)
+    record = GameRecord(None, record.moves, interval)
+    targets = [rng.randrange(len(record) + 1) for _ in range(seeks)]
+
+    start = time.perf_counter()
+    for ply in targets:
+        record.seek(ply)
+    seek_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ply in targets:
+        board = GameBoard()
+        for move in record.moves[:ply]:
+            board.make_move(move)
+    replay_seconds = time.perf_counter() - start
+
+    for ply in targets[:20]:
+        board = GameBoard()
+        for move in record.moves[:ply]:
+            board.make_move(move)
+        if record.seek(ply).key != board.key:
+            raise AssertionError('Seek to ply {} reached the wrong '
+                                 'position'.format(ply))
+
+    start = time.perf_counter()
+    record.seek(0)
+    while record.forward() is not None:
+        pass
+    while record.backward() is not None:
+        pass
+    step_seconds = time.perf_counter() - start
+
+    print('{} plies in {} bytes, a position every {} plies'.format(
+        len(record), record.nbytes, interval))
+    print('seek     {:>9.1f}us per seek'.format(seek_seconds / seeks * 1e6))
+    print('replay   {:>9.1f}us per seek'.format(replay_seconds / seeks * 1e6))
+    print('step     {:>9.1f}us per ply'.format(
+        step_seconds / (2 * len(record)) * 1e6))
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Time moving through a game record.')
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--plies', type=int, default=2000)
+    parser.add_argument('--interval', type=int, default=SNAPSHOT_INTERVAL,
+                        help='plies between positions kept')
+    parser.add_argument('--seeks', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.plies, args.interval, args.seeks, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""Playing games of chess with no one at the keyboard.
+
+Each side of a game is played by a move chooser: a function given the game
+board that returns the move to play. Games are shared out between worker
+processes, and each finished game is sent back as PGN text and written to
+gzip-compressed shard files of a fixed number of games, so a corpus of any
+size is written without being held in memory.
+
+Usage:
+    python -m pychess.selfplay GAMES [--white CHOOSER] [--black CHOOSER]
+        [--time SECONDS] [--depth N] [--opening-plies N] [--processes N]
+        [--per-shard N] [--output DIR] [--seed N]
+"""
+import datetime
+import os
+import random
+import time
+from multiprocessing.pool import Pool
+from typing import Callable, Dict, IO, List, Optional
+
+from .bitboard import WHITE, KING
+from .chess_game import GameBoard
+from .engine import Engine
+from .moves import Move
+from .pgn import Game, format_game, open_pgn
+
+Chooser = Callable[[GameBoard], Move]
+
+# The move choosers that can play either side: random legal moves, the
+# engine searching for a time limit, or the engine searching to a depth.
+CHOOSERS = ('random', 'engine', 'depth')
+
+# The engine of each worker process, shared by both sides of its games and
+# kept between games so its transposition table is reused.
+_engine = None
+
+
+def _start_worker(megabytes: float) -> None:
+    """Create the engine of a new worker process."""
+    global _engine
+    _engine = Engine(megabytes)
+
+
+def make_chooser(name: str, rng: random.Random, time_limit: float = 0.1,
+                 depth: int = 2) -> Chooser:
+    """Return the move chooser called <name> in CHOOSERS. Random moves are
+    drawn from <rng>, the 'engine' chooser searches for <time_limit> seconds
+    and the 'depth' chooser searches <depth> moves deep. Raise ValueError if
+    there is no chooser called <name>."""
+    global _engine
+    if name == 'random':
+        return lambda game: rng.choice(game.legal_moves())
+    if name not in CHOOSERS:
+        raise ValueError('Unknown move chooser: ' + name)
+    if _engine is None:
+        _engine = Engine()
+    engine = _engine
+    if name == 'engine':
+        return lambda game: engine.search(game, time_limit).move
+    return lambda game: engine.search(game, float('inf'), depth).move
+
+
+def play_game(white: Chooser, black: Chooser, max_plies: int = 400,
+              opening_plies: int = 0,
+              rng: Optional[random.Random] = None) -> Game:
+    """Return a game played between the <white> and <black> choosers.
+
+    The first <opening_plies> moves are chosen at random from <rng>, so
+    choosers that always pick the same move still play different games. The
+    game is drawn by threefold repetition, the fifty-move rule or when only
+    the kings are left, and left unfinished after <max_plies> moves.
+    """
+    if rng is None:
+        rng = random.Random()
+    board = GameBoard()
+    seen = {board.key: 1}
+    moves = []
+    result = '*'
+    while len(moves) < max_plies:
+        legal = board.legal_moves()
+        if not legal:
+            if not board.in_check():
+                result = '1/2-1/2'
+            else:
+                result = '0-1' if board.side == WHITE else '1-0'
+            break
+        if board.halfmove_clock >= 100 or seen[board.key] >= 3 or \
+                board.occupancy[2] == board.bitboards[KING] | \
+                board.bitboards[6 + KING]:
+            result = '1/2-1/2'
+            break
+        if len(moves) < opening_plies:
+            move = rng.choice(legal)
+        elif board.side == WHITE:
+            move = white(board)
+        else:
+            move = black(board)
+        board.apply_move(move)
+        moves.append(move)
+        seen[board.key] = seen.get(board.key, 0) + 1
+    return Game({}, moves, result)
+
+
+def _play_task(task: tuple) -> tuple:
+    """Play one game and return its (result, PGN text)."""
+    index, white_name, black_name, seed, time_limit, depth, opening_plies, \
+        max_plies = task
+    rng = random.Random(seed << 32 | index)
+    game = play_game(make_chooser(white_name, rng, time_limit, depth),
+                     make_chooser(black_name, rng, time_limit, depth),
+                     max_plies, opening_plies, rng)
+    game.headers = {'Event': 'Self-play',
+                    'Date': datetime.date.today().strftime('%Y.%m.%d'),
+                    'Round': str(index + 1),
+                    'White': white_name,
+                    'Black': black_name,
+                    'PlyCount': str(len(game.moves))}
+    return game.result, format_game(game)
+
+
+class ShardWriter:
+    """Writes PGN text to a numbered series of gzip-compressed files, starting
+    a new file every time one holds a fixed number of games.
+
+    === Attributes ===
+    directory:
+        The directory the shard files are written to.
+    per_shard:
+        The number of games written to each shard.
+    paths:
+        The path of every shard started so far.
+    games:
+        The number of games written so far.
+    """
+    directory: str
+    per_shard: int
+    paths: List[str]
+    games: int
+    _prefix: str
+    _file: Optional[IO[str]]
+
+    def __init__(self, directory: str, per_shard: int = 1000,
+                 prefix: str = 'selfplay') -> None:
+        """Write shards named <prefix>-00000.pgn.gz and so on to
+        <directory>, creating it if needed."""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.per_shard = per_shard
+        self.paths = []
+        self.games = 0
+        self._prefix = prefix
+        self._file = None
+
+    def __enter__(self) -> 'ShardWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, text: str) -> None:
+        """Write the PGN <text> of one game."""
+        if self._file is None or self.games % self.per_shard == 0:
+            self.close()
+            path = os.path.join(self.directory, '{}-{:05d}.pgn.gz'.format(
+                self._prefix, len(self.paths)))
+            self.paths.append(path)
+            self._file = open_pgn(path, 'w')
+        self._file.write(text)
+        self.games += 1
+
+    def close(self) -> None:
+        """Finish the shard being written."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def generate(games: int, white: str = 'random', black: str = 'random',
+             output: str = 'selfplay', per_shard: int = 1000,
+             processes: Optional[int] = None, seed: int = 0,
+             time_limit: float = 0.1, depth: int = 2, opening_plies: int = 4,
+             max_plies: int = 400, megabytes: float = 16) -> Dict[str, int]:
+    """Play <games> games between the <white> and <black> choosers on
+    <processes> workers, one per core if not given, write them to shards in
+    <output>, and return how many games ended with each result.
+
+    Games are written in the order they finish; the Round tag of each gives
+    the order they were started in. Games between 'random' choosers are the
+    same on every run with the same <seed>.
+    """
+    for name in (white, black):
+        if name not in CHOOSERS:
+            raise ValueError('Unknown move chooser: ' + name)
+    tasks = [(index, white, black, seed, time_limit, depth, opening_plies,
+              max_plies) for index in range(games)]
+    results = {result: 0 for result in ('1-0', '0-1', '1/2-1/2', '*')}
+    with Pool(processes or os.cpu_count() or 1, _start_worker,
+              (megabytes,)) as pool, ShardWriter(output, per_shard) as writer:
+        for result, text in pool.imap_unordered(_play_task, tasks):
+            writer.write(text)
+            results[result] += 1
+    return results
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Play games automatically and save them as PGN.')
+    parser.add_argument('games', type=int)
+    parser.add_argument('--white', choices=CHOOSERS, default='random')
+    parser.add_argument('--black', choices=CHOOSERS, default='random')
+    parser.add_argument('--time', type=float, default=0.1,
+                        help='seconds per move for the engine chooser')
+    parser.add_argument('--depth', type=int, default=2,
+                        help='search depth for the depth chooser')
+    parser.add_argument('--opening-plies', type=int, default=4,
+                        help='random moves at the start of each game')
+    parser.add_argument('--max-plies', type=int, default=400)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--per-shard', type=int, default=1000,
+                        help='games in each output file')
+    parser.add_argument('--output', default='selfplay',
+                        help='directory for the output files')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = generate(args.games, args.white, args.black, args.output,
+                       args.per_shard, args.processes, args.seed, args.time,
+                       args.depth, args.opening_plies, args.max_plies)
+    seconds = time.perf_counter() - start
+    print('{} games in {:.2f}s, {:.1f} games per second'.format(
+        args.games, seconds, args.games / seconds))
+    print(', '.join('{} {}'.format(result, count)
+                    for result, count in results.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,498 @@
+"""An asyncio server hosting many games of chess at once.
+
+Clients connect over TCP or a unix socket and send one command per line. A
+connection can play in any number of games, and every game is a GameBoard
+held in memory, so one process serves thousands of games. Each command gets
+one reply line, starting with OK or ERR, in the order the commands were
+sent. Other lines are pushed to a player when something happens in one of
+their games.
+
+Commands:
+    NEW [engine [SECONDS]]  start a game as white, against the engine if
+                            asked -> OK <game> white
+    JOIN <game>             join a game as black -> OK <game> black
+    MOVE <game> <move>      play a move, e.g. e2e4 or e7e8q -> OK <game> <move>
+    LEGAL <game>            -> OK <game> <move> <move> ...
+    FEN <game>              -> OK <game> <fen>
+    STATS                   -> OK <json>, the counters and timers of the
+                            server's hot paths, if it is measuring them
+    RESIGN <game>           -> OK <game>
+    QUIT                    -> OK, and the connection is closed
+
+Pushed lines:
+    JOINED <game>           an opponent has joined the game
+    MOVED <game> <move>     the opponent has played <move>
+    END <game> <result>     the game is over, e.g. END 7 1-0, or END 7 * if
+                            the engine failed to move
+    LEFT <game>             the opponent has disconnected
+
+Usage:
+    python -m pychess.server serve [--host HOST] [--port PORT] [--unix PATH]
+        [--book BOOK] [--stats FILE] [--stats-interval SECONDS]
+        [--profile FILE]
+    python -m pychess.server load [--games N] [--connections N] [--moves N]
+        [--host HOST] [--port PORT] [--unix PATH]
+"""
+import asyncio
+import functools
+import json
+import logging
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Dict, List, Optional, Set
+
+from . import stats
+from .bitboard import WHITE, BLACK
+from .book import OpeningBook
+from .chess_game import GameBoard
+from .engine import Engine
+from .moves import Move, move_name
+
+PORT = 8765
+
+_log = logging.getLogger(__name__)
+
+# The engine of each process searching for the server, kept between moves so
+# its transposition table is reused.
+_engine = None
+
+
+def _engine_move(game: GameBoard, time_limit: float) -> Move:
+    """Return the move the engine chooses in <game>."""
+    global _engine
+    if _engine is None:
+        _engine = Engine()
+    return _engine.search(game, time_limit).move
+
+
+class Connection:
+    """A client connected to the server.
+
+    === Attributes ===
+    games:
+        The ids of the games this client is playing in.
+    """
+    games: Set[int]
+    _writer: asyncio.StreamWriter
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.games = set()
+        self._writer = writer
+
+    def send(self, line: str) -> None:
+        """Send <line> to the client without waiting for it to be sent."""
+        if not self._writer.is_closing():
+            self._writer.write(line.encode() + b'\n')
+
+
+class Session:
+    """A game hosted by the server.
+
+    === Attributes ===
+    id:
+        The number the game is known by in commands.
+    game:
+        The position of the game.
+    players:
+        The connection playing each colour, or None if there is no one
+        playing that colour yet.
+    engine_time:
+        The seconds the engine searches for each move if it plays black,
+        or None if black is a client.
+    result:
+        The result of the game once it is over, otherwise None.
+    """
+    id: int
+    game: GameBoard
+    players: List[Optional[Connection]]
+    engine_time: Optional[float]
+    result: Optional[str]
+
+    def __init__(self, session_id: int, white: Connection,
+                 engine_time: Optional[float] = None) -> None:
+        self.id = session_id
+        self.game = GameBoard()
+        self.players = [white, None]
+        self.engine_time = engine_time
+        self.result = None
+
+    def opponent(self, connection: Connection) -> Optional[Connection]:
+        """Return the other player in the game from <connection>."""
+        if self.players[WHITE] is connection:
+            return self.players[BLACK]
+        return self.players[WHITE]
+
+    def outcome(self) -> Optional[str]:
+        """Return the result if the position has ended the game, by mate,
+        stalemate, the fifty-move rule or threefold repetition, or None."""
+        game = self.game
+        if not game.legal_moves():
+            if not game.in_check():
+                return '1/2-1/2'
+            return '0-1' if game.side == WHITE else '1-0'
+        if game.halfmove_clock >= 100 or game.repetitions() >= 3:
+            return '1/2-1/2'
+        return None
+
+
+class GameServer:
+    """A server hosting games for clients that connect to it.
+
+    === Attributes ===
+    sessions:
+        Every game being played, by id.
+    moves:
+        The number of moves played on the server.
+    book:
+        The opening book the engine plays from before searching, or None.
+    """
+    sessions: Dict[int, Session]
+    moves: int
+    book: Optional[OpeningBook]
+    _next_id: int
+    _executor: Optional[ProcessPoolExecutor]
+    _engine_processes: int
+
+    def __init__(self, engine_processes: int = 1,
+                 book: Optional[OpeningBook] = None) -> None:
+        """Create a server that searches for engine moves in
+        <engine_processes> processes, playing from <book> first."""
+        self.sessions = {}
+        self.moves = 0
+        self.book = book
+        self._next_id = 1
+        self._executor = None
+        self._engine_processes = engine_processes
+
+    async def serve(self, host: str = '127.0.0.1', port: int = PORT,
+                    path: Optional[str] = None) -> None:
+        """Serve clients on <host> and <port>, or on the unix socket at
+        <path> if given, until cancelled."""
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        """Answer the commands of one client until it disconnects."""
+        connection = Connection(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode(errors='replace').split()
+                if not words:
+                    continue
+                if words[0].upper() == 'QUIT':
+                    connection.send('OK')
+                    break
+                connection.send(self.command(connection, words))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.disconnect(connection)
+            writer.close()
+
+    def command(self, connection: Connection, words: List[str]) -> str:
+        """Carry out the command in <words> from <connection> and return the
+        reply."""
+        name = words[0].upper()
+        try:
+            if name == 'NEW':
+                return self._new(connection, words[1:])
+            if name == 'STATS':
+                return 'OK ' + json.dumps(stats.stats())
+            if name not in ('JOIN', 'MOVE', 'LEGAL', 'FEN', 'RESIGN'):
+                return 'ERR unknown command ' + words[0]
+            if len(words) < 2:
+                return 'ERR missing game'
+            session = self.sessions.get(int(words[1])) \
+                if words[1].isdigit() else None
+            if session is None:
+                return 'ERR no game ' + words[1]
+            if name == 'JOIN':
+                return self._join(connection, session)
+            if name == 'MOVE':
+                if len(words) < 3:
+                    return 'ERR missing move'
+                return self._move(connection, session, words[2])
+            if name == 'LEGAL':
+                return 'OK {} {}'.format(session.id, ' '.join(
+                    move_name(move) for move in session.game.legal_moves()))
+            if name == 'FEN':
+                return 'OK {} {}'.format(session.id, session.game.to_fen())
+            if connection not in session.players:
+                return 'ERR not playing in game {}'.format(session.id)
+            if session.result is None:
+                lost = session.players.index(connection)
+                self._end(session, '0-1' if lost == WHITE else '1-0')
+            return 'OK {}'.format(session.id)
+        except ValueError as error:
+            return 'ERR ' + str(error)
+
+    def _new(self, connection: Connection, options: List[str]) -> str:
+        """Start a game with <connection> playing white."""
+        engine_time = None
+        if options:
+            if options[0].lower() != 'engine':
+                raise ValueError('unknown option ' + options[0])
+            engine_time = float(options[1]) if len(options) > 1 else 0.5
+        session = Session(self._next_id, connection, engine_time)
+        self._next_id += 1
+        self.sessions[session.id] = session
+        connection.games.add(session.id)
+        return 'OK {} white'.format(session.id)
+
+    def _join(self, connection: Connection, session: Session) -> str:
+        """Add <connection> to <session> as black."""
+        if session.players[BLACK] is not None or \
+                session.engine_time is not None:
+            return 'ERR game {} is full'.format(session.id)
+        session.players[BLACK] = connection
+        connection.games.add(session.id)
+        session.players[WHITE].send('JOINED {}'.format(session.id))
+        return 'OK {} black'.format(session.id)
+
+    def _move(self, connection: Connection, session: Session,
+              text: str) -> str:
+        """Play the move written <text> for <connection> in <session>."""
+        game = session.game
+        if session.result is not None:
+            return 'ERR game {} is over'.format(session.id)
+        if session.players[game.side] is not connection:
+            return 'ERR not your turn in game {}'.format(session.id)
+        for move in game.legal_moves():
+            if move_name(move) == text:
+                break
+        else:
+            return 'ERR illegal move ' + text
+        self._play(session, move)
+        if session.result is None and session.engine_time is not None:
+            reply = asyncio.ensure_future(self._engine_reply(session))
+            reply.add_done_callback(
+                functools.partial(self._engine_replied, session))
+        return 'OK {} {}'.format(session.id, text)
+
+    def _play(self, session: Session, move: Move) -> None:
+        """Play <move> in <session> and tell the players about it."""
+        mover = session.players[session.game.side]
+        session.game.apply_move(move)
+        self.moves += 1
+        opponent = session.opponent(mover) if mover is not None else \
+            session.players[WHITE]
+        if opponent is not None and opponent is not mover:
+            opponent.send('MOVED {} {}'.format(session.id, move_name(move)))
+        result = session.outcome()
+        if result is not None:
+            asyncio.get_running_loop().call_soon(self._end, session, result)
+
+    async def _engine_reply(self, session: Session) -> None:
+        """Play the engine's move in <session>: a book move if there is one,
+        otherwise one searched for in another process, so other games carry
+        on meanwhile."""
+        move = None
+        if self.book is not None:
+            move = self.book.choose(session.game)
+        if move is None:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self._engine_processes)
+            move = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _engine_move, session.game,
+                session.engine_time)
+        if session.result is None and session.id in self.sessions:
+            self._play(session, move)
+
+    def _engine_replied(self, session: Session,
+                        reply: asyncio.Future) -> None:
+        """End <session> if the engine failed to reply in it, so its player
+        isn't left waiting for a move that will never come."""
+        if reply.cancelled() or reply.exception() is None:
+            return
+        _log.error('Engine reply failed in game %d', session.id,
+                   exc_info=reply.exception())
+        self._end(session, '*')
+
+    def _end(self, session: Session, result: str) -> None:
+        """End <session> with <result> and tell the players."""
+        if session.result is not None:
+            return
+        session.result = result
+        for player in session.players:
+            if player is not None:
+                player.send('END {} {}'.format(session.id, result))
+
+    def disconnect(self, connection: Connection) -> None:
+        """Leave every game <connection> was playing in, removing games no
+        one is left playing."""
+        for session_id in connection.games:
+            session = self.sessions.get(session_id)
+            if session is None:
+                continue
+            players = session.players
+            for colour in (WHITE, BLACK):
+                if players[colour] is connection:
+                    players[colour] = None
+            if players[WHITE] is None and players[BLACK] is None:
+                del self.sessions[session_id]
+            for player in players:
+                if player is not None:
+                    player.send('LEFT {}'.format(session_id))
+        connection.games.clear()
+
+
+class Client:
+    """A client of a GameServer that can have many commands waiting for
+    replies at once.
+
+    === Attributes ===
+    pushed:
+        The number of pushed lines received.
+    """
+    pushed: int
+    _reader: asyncio.StreamReader
+    _writer: asyncio.StreamWriter
+    _waiting: Deque[asyncio.Future]
+    _listener: asyncio.Future
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = PORT,
+                      path: Optional[str] = None) -> 'Client':
+        """Return a client connected to the server at <host> and <port>, or
+        at the unix socket <path> if given."""
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        client = cls()
+        client.pushed = 0
+        client._reader = reader
+        client._writer = writer
+        client._waiting = deque()
+        client._listener = asyncio.ensure_future(client._listen())
+        return client
+
+    async def _listen(self) -> None:
+        """Pass each reply to the command waiting for it."""
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            line = line.decode().rstrip('\n')
+            if line.startswith('OK') or line.startswith('ERR'):
+                self._waiting.popleft().set_result(line)
+            else:
+                self.pushed += 1
+        while self._waiting:
+            self._waiting.popleft().set_exception(
+                ConnectionError('server closed the connection'))
+
+    async def command(self, line: str) -> str:
+        """Send the command <line> and return the reply."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append(future)
+        self._writer.write(line.encode() + b'\n')
+        return await future
+
+    async def close(self) -> None:
+        """Disconnect from the server."""
+        self._writer.close()
+        await self._listener
+
+
+async def _load_game(white: Client, black: Client, moves: int,
+                     rng: random.Random, latencies: List[float]) -> None:
+    """Play a game of random moves between <white> and <black>, adding the
+    seconds each move took to be accepted to <latencies>."""
+    reply = await white.command('NEW')
+    session_id = reply.split()[1]
+    await black.command('JOIN ' + session_id)
+    game = GameBoard()
+    for _ in range(moves):
+        legal = game.legal_moves()
+        if not legal or game.halfmove_clock >= 100:
+            break
+        move = rng.choice(legal)
+        client = white if game.side == WHITE else black
+        start = time.perf_counter()
+        reply = await client.command('MOVE {} {}'.format(session_id,
+                                                         move_name(move)))
+        latencies.append(time.perf_counter() - start)
+        if not reply.startswith('OK'):
+            raise ValueError(reply)
+        game.make_move(move)
+    await white.command('RESIGN ' + session_id)
+
+
+async def load_test(games: int = 1000, connections: int = 50,
+                    moves: int = 40, host: str = '127.0.0.1',
+                    port: int = PORT, path: Optional[str] = None,
+                    seed: int = 0) -> List[float]:
+    """Play <games> games of random moves at once over <connections>
+    connections to a server, each of at most <moves> moves, and return the
+    seconds every move took to be accepted, in order."""
+    rng = random.Random(seed)
+    clients = [await Client.connect(host, port, path)
+               for _ in range(connections)]
+    latencies = []
+    await asyncio.gather(*(
+        _load_game(clients[i % connections], clients[(i + 1) % connections],
+                   moves, rng, latencies)
+        for i in range(games)))
+    for client in clients:
+        await client.close()
+    return sorted(latencies)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the value <fraction> of the way through sorted <values>."""
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Host games of chess, or load test a server.')
+    parser.add_argument('command', choices=['serve', 'load'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--unix', default=None,
+                        help='path of a unix socket to use instead of TCP')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--moves', type=int, default=40)
+    parser.add_argument('--book', default=None,
+                        help='an opening book for the engine to play from')
+    stats.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        book = OpeningBook(args.book) if args.book is not None else None
+        try:
+            with stats.measured(args):
+                asyncio.run(GameServer(book=book).serve(args.host, args.port,
+                                                        args.unix))
+        except KeyboardInterrupt:
+            pass
+        return
+    start = time.perf_counter()
+    latencies = asyncio.run(load_test(args.games, args.connections,
+                                      args.moves, args.host, args.port,
+                                      args.unix))
+    seconds = time.perf_counter() - start
+    print('{} games, {} moves in {:.2f}s, {:.0f} moves per second'.format(
+        args.games, len(latencies), seconds, len(latencies) / seconds))
+    print('move latency p50 {:.2f}ms p99 {:.2f}ms'.format(
+        percentile(latencies, 0.5) * 1000,
+        percentile(latencies, 0.99) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+"""Counters and timers for the hot paths of the game, read from inside a
+running process.
+
+Nothing is measured until enable() is called. It replaces each function in
+TIMED with a wrapper that counts its calls and the time spent in them, each
+in LOOKUPS with one that counts how often it finds what it looks for, and
+GameBoard._generate with one that also counts the moves generated for each
+type of piece. disable() puts the original functions back, so a process
+that isn't measuring runs exactly the code it would without this module.
+
+stats() returns a snapshot of everything counted, StatsWriter writes one to
+a JSON file every few seconds, and profiled() runs a block under cProfile.
+
+Usage:
+    python -m pychess.stats FILE    (print a file written by StatsWriter)
+"""
+import functools
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# The functions timed, as (module, name) with the name of a method written
+# Class.method. Functions in modules that haven't been imported when enable()
+# is called are left alone, so measuring never imports the server or the
+# engine into a process that doesn't use them.
+TIMED = (
+    ('chess_game', 'GameBoard.legal_moves'),
+    ('chess_game', 'GameBoard.generate_moves'),
+    ('chess_game', 'GameBoard.make_move'),
+    ('chess_game', 'GameBoard.unmake_move'),
+    ('chess_game', 'GameBoard.apply_move'),
+    ('chess_game', 'GameBoard.move_piece'),
+    ('chess_game', 'Pawn.get_allowed_moves'),
+    ('chess_game', 'Knight.get_allowed_moves'),
+    ('chess_game', 'Bishop.get_allowed_moves'),
+    ('chess_game', 'Rook.get_allowed_moves'),
+    ('chess_game', 'Queen.get_allowed_moves'),
+    ('chess_game', 'King.get_allowed_moves'),
+    ('evaluation', 'evaluate'),
+    ('engine', 'Engine.search'),
+    ('server', 'GameServer.command'),
+    ('server', 'GameServer._new'),
+    ('server', 'GameServer._join'),
+    ('server', 'GameServer._move'),
+)
+
+# The functions that look something up and return None when they don't find
+# it, counted as hits and misses.
+LOOKUPS = (
+    ('chess_game', 'GameBoard._cached'),
+    ('transposition', 'TranspositionTable.probe'),
+    ('book', 'OpeningBook.choose'),
+    ('tablebase', 'Tablebases.probe'),
+)
+
+# The names of the piece types, indexed by type, for counting moves.
+PIECE_TYPE_NAMES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+
+# The calls and seconds of each timed function, and the hits and misses of
+# each lookup, by name. The lists are updated in place by the wrappers.
+_timers = {}
+_lookups = {}
+# The number of moves generated for each type of piece.
+_generated = [0] * 6
+# The (owner, attribute, original function) of everything replaced.
+_replaced = []
+# The original of each function replaced, by its wrapper, to find wrappers
+# imported by name while measuring.
+_originals = {}
+_started = time.perf_counter()
+
+
+def _timed(name: str, function: Callable) -> Callable:
+    """Return <function> wrapped to count its calls and time under <name>."""
+    counter = _timers.setdefault(name, [0, 0.0])
+    clock = time.perf_counter
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            counter[0] += 1
+            counter[1] += clock() - start
+    return wrapper
+
+
+def _lookup(name: str, function: Callable) -> Callable:
+    """Return <function> wrapped to count its hits and misses under
+    <name>."""
+    counter = _lookups.setdefault(name, [0, 0])
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        found = function(*args, **kwargs)
+        counter[found is None] += 1
+        return found
+    return wrapper
+
+
+def _generating(function: Callable) -> Callable:
+    """Return GameBoard._generate wrapped to be timed and to count the moves
+    it generates by type of piece."""
+    timed = _timed('GameBoard._generate', function)
+    generated = _generated
+
+    @functools.wraps(function)
+    def wrapper(game, *args):
+        moves = timed(game, *args)
+        squares = game.squares
+        for move in moves:
+            generated[squares[move & 63] % 6] += 1
+        return moves
+    return wrapper
+
+
+def _module_name(module) -> str:
+    """Return the name <module> was imported as, which for a module run with
+    python -m is its real name rather than __main__."""
+    spec = getattr(module, '__spec__', None)
+    return spec.name if spec is not None else module.__name__
+
+
+def _module(module_name: str):
+    """Return the module pychess.<module_name>, or None if it hasn't been
+    imported."""
+    name = __package__ + '.' + module_name
+    module = sys.modules.get(name)
+    if module is None and _module_name(sys.modules['__main__']) == name:
+        module = sys.modules['__main__']
+    return module
+
+
+def _replace(module_name: str, name: str,
+             wrap: Callable[[Callable], Callable]) -> None:
+    """Replace the function <name> in pychess.<module_name> with
+    wrap(function), if that module has been imported."""
+    module = _module(module_name)
+    if module is None:
+        return
+    owner = module
+    *classes, attribute = name.split('.')
+    for class_name in classes:
+        owner = getattr(owner, class_name)
+    original = owner.__dict__[attribute]
+    wrapper = wrap(original)
+    _replaced.append((owner, attribute, original))
+    _originals[wrapper] = original
+    setattr(owner, attribute, wrapper)
+    if classes:
+        return
+    # Modules that imported the function by name call their own reference
+    # to it, so those are replaced too.
+    for other in list(sys.modules.values()):
+        if _module_name(other).startswith(__package__ + '.') and \
+                other is not module and \
+                getattr(other, attribute, None) is original:
+            _replaced.append((other, attribute, original))
+            setattr(other, attribute, getattr(module, attribute))
+
+
+def enabled() -> bool:
+    """Return whether the hot paths are being measured."""
+    return bool(_replaced)
+
+
+def enable() -> None:
+    """Start measuring the functions in TIMED and LOOKUPS, and the moves
+    generated, in every module of the package imported so far. The package's
+    rules are imported if they haven't been."""
+    if _replaced:
+        return
+    importlib.import_module('.chess_game', __package__)
+    for module_name, name in TIMED:
+        _replace(module_name, name, functools.partial(_timed, name))
+    for module_name, name in LOOKUPS:
+        _replace(module_name, name, functools.partial(_lookup, name))
+    _replace('chess_game', 'GameBoard._generate', _generating)
+
+
+def disable() -> None:
+    """Stop measuring and put back every function that was replaced, in the
+    modules that imported one by name while measuring too. What was counted
+    is kept until reset()."""
+    while _replaced:
+        owner, attribute, original = _replaced.pop()
+        setattr(owner, attribute, original)
+    for module in list(sys.modules.values()):
+        if not _module_name(module).startswith(__package__ + '.'):
+            continue
+        for attribute, value in list(vars(module).items()):
+            if isinstance(value, types.FunctionType) and value in _originals:
+                setattr(module, attribute, _originals[value])
+    _originals.clear()
+
+
+def reset() -> None:
+    """Set every count and time back to zero."""
+    global _started
+    for counter in _timers.values():
+        counter[0] = 0
+        counter[1] = 0.0
+    for counter in _lookups.values():
+        counter[0] = counter[1] = 0
+    _generated[:] = [0] * 6
+    _started = time.perf_counter()
+
+
+def stats() -> dict:
+    """Return a snapshot of everything counted since the last reset(), in a
+    form that can be written as JSON."""
+    timers = {}
+    for name, (calls, seconds) in _timers.items():
+        timers[name] = {'calls': calls, 'seconds': seconds,
+                        'mean_us': seconds / calls * 1e6 if calls else 0.0}
+    lookups = {}
+    for name, (hits, misses) in _lookups.items():
+        lookups[name] = {'hits': hits, 'misses': misses,
+                         'hit_rate': hits / (hits + misses)
+                         if hits + misses else 0.0}
+    return {'enabled': enabled(),
+            'seconds': time.perf_counter() - _started,
+            'timers': timers,
+            'lookups': lookups,
+            'generated': dict(zip(PIECE_TYPE_NAMES, _generated))}
+
+
+def write_stats(path: str) -> None:
+    """Write a snapshot of stats() to the JSON file at <path>, replacing it
+    in one step so a reader never sees half a file."""
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(stats(), file, indent=2)
+    os.replace(temporary, path)
+
+
+class StatsWriter:
+    """Writes stats() to a JSON file every few seconds from a background
+    thread, and once more when stopped.
+
+    === Attributes ===
+    path:
+        The file written.
+    interval:
+        The seconds between writes.
+    """
+    path: str
+    interval: float
+    _stop: threading.Event
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, path: str, interval: float = 10.0) -> None:
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self) -> 'StatsWriter':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start writing in the background."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop writing, after writing the final counts."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        write_stats(self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            write_stats(self.path)
+
+
+@contextmanager
+def profiled(path: Optional[str]) -> Iterator[None]:
+    """Run the body of the with statement under cProfile and write the
+    profile to <path>, to be read with pstats, or just run it if <path> is
+    None."""
+    if path is None:
+        yield
+        return
+    import cProfile
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+
+
+def add_arguments(parser) -> None:
+    """Add the options of measured() to the argparse <parser> of a
+    command line."""
+    parser.add_argument('--stats', default=None,
+                        help='count and time the hot paths, writing them to '
+                             'this JSON file')
+    parser.add_argument('--stats-interval', type=float, default=10.0,
+                        help='seconds between writes of the stats file')
+    parser.add_argument('--profile', default=None,
+                        help='run under cProfile, writing the profile to '
+                             'this file')
+
+
+@contextmanager
+def measured(args) -> Iterator[None]:
+    """Measure the body of the with statement as the options added by
+    add_arguments ask: writing stats to args.stats every
+    args.stats_interval seconds, and profiling it to args.profile."""
+    writer = None
+    if args.stats is not None:
+        enable()
+        writer = StatsWriter(args.stats, args.stats_interval)
+        writer.start()
+    try:
+        with profiled(args.profile):
+            yield
+    finally:
+        if writer is not None:
+            writer.stop()
+            disable()
+
+
+def format_stats(snapshot: dict) -> List[str]:
+    """Return the lines of a readable table of a stats() <snapshot>."""
+    lines = ['{:<32} {:>10} {:>10} {:>10}'.format(
+        'function', 'calls', 'seconds', 'mean us')]
+    for name, timer in sorted(snapshot['timers'].items(),
+                              key=lambda item: -item[1]['seconds']):
+        if timer['calls']:
+            lines.append('{:<32} {:>10} {:>10.3f} {:>10.1f}'.format(
+                name, timer['calls'], timer['seconds'], timer['mean_us']))
+    for name, lookup in sorted(snapshot['lookups'].items()):
+        if lookup['hits'] + lookup['misses']:
+            lines.append('{:<32} {:>10} hits {:>10} misses {:>6.1%}'.format(
+                name, lookup['hits'], lookup['misses'], lookup['hit_rate']))
+    generated: Dict[str, int] = snapshot['generated']
+    if any(generated.values()):
+        lines.append('moves generated: ' + ', '.join(
+            '{} {}'.format(name, count) for name, count in generated.items()))
+    return lines
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Print a stats file.')
+    parser.add_argument('file')
+    args = parser.parse_args()
+    with open(args.file) as file:
+        print('\n'.join(format_stats(json.load(file))))
+
+
+if __name__ == '__main__':
+    main()
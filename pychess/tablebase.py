@@ -0,0 +1,364 @@
+"""Endgame tablebases: perfect play with a king and one piece against a king.
+
+A table holds every position of one ending, such as KQK (king and queen
+against king), with the number of moves to mate by best play. It is
+generated by retrograde analysis: starting from the positions where the lone
+king is checkmated, moves are taken back one at a time, so positions are
+found in order of how far they are from mate. Pawn endings are solved from
+the queen and rook tables their promotions lead to.
+
+A table file is a short header followed by one byte for each position, at
+the offset table_index gives it. The byte is 0 for a draw (or an impossible
+position), otherwise 1 more than the number of moves to mate, counted in
+single moves of either side. Positions are stored with the stronger side as
+white; probe flips the board when black is the stronger side.
+
+Usage:
+    python -m pychess.tablebase generate [TABLE ...] [--output DIR]
+        [--processes N]
+    python -m pychess.tablebase probe FEN [--directory DIR]
+"""
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterator, List, Optional
+
+from .bitboard import (WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+                       KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, popcount,
+                       squares_of, rook_attacks, bishop_attacks, queen_attacks)
+from .chess_game import GameBoard
+from .moves import move_name
+
+# The piece the stronger side has besides its king in each ending.
+TABLES = {'KQK': QUEEN, 'KRK': ROOK, 'KBK': BISHOP, 'KNK': KNIGHT,
+          'KPK': PAWN}
+
+# The most pieces, kings included, in a position any table covers.
+MAX_PIECES = 3
+
+# One byte for each side to move, white king, black king and piece square.
+TABLE_BYTES = 2 << 18
+
+# The magic bytes, format version and piece of a table file, padded to 16.
+HEADER = struct.Struct('>4sBB10x')
+MAGIC = b'PYTB'
+VERSION = 1
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+
+def table_index(side: int, white_king: int, black_king: int,
+                piece: int) -> int:
+    """Return the offset in a table of the position with <side> to move and
+    the kings and white's piece on the given squares."""
+    return side << 18 | white_king << 12 | black_king << 6 | piece
+
+
+def _attacks(piece_type: int, sq: int, occupied: int) -> int:
+    """Return the squares a white piece of <piece_type> on <sq> attacks."""
+    if piece_type == PAWN:
+        return PAWN_ATTACKS[WHITE][sq]
+    if piece_type == KNIGHT:
+        return KNIGHT_ATTACKS[sq]
+    if piece_type == BISHOP:
+        return bishop_attacks(sq, occupied)
+    if piece_type == ROOK:
+        return rook_attacks(sq, occupied)
+    return queen_attacks(sq, occupied)
+
+
+def _legal(piece_type: int, white_king: int, black_king: int, piece: int,
+           side: int) -> bool:
+    """Return whether the position with <side> to move can occur in a game.
+    """
+    if white_king == black_king or piece == white_king or \
+            piece == black_king:
+        return False
+    if KING_ATTACKS[white_king] >> black_king & 1:
+        return False
+    if piece_type == PAWN and not 8 <= piece < 56:
+        return False
+    if side == WHITE:
+        occupied = 1 << white_king | 1 << black_king | 1 << piece
+        return not _attacks(piece_type, piece, occupied) >> black_king & 1
+    return True
+
+
+def _white_unmoves(piece_type: int, index: int) -> Iterator[int]:
+    """Yield the index of every position with white to move from which a
+    white move leads to the position with black to move at <index>."""
+    white_king = index >> 12 & 63
+    black_king = index >> 6 & 63
+    piece = index & 63
+    occupied = 1 << white_king | 1 << black_king | 1 << piece
+    for start in squares_of(KING_ATTACKS[white_king] & ~occupied):
+        if _legal(piece_type, start, black_king, piece, WHITE):
+            yield start << 12 | black_king << 6 | piece
+    if piece_type == PAWN:
+        starts = []
+        if piece >= 16 and not occupied >> piece - 8 & 1:
+            starts.append(piece - 8)
+            if piece >> 3 == 3 and not occupied >> piece - 16 & 1:
+                starts.append(piece - 16)
+    else:
+        starts = squares_of(_attacks(piece_type, piece, occupied) &
+                            ~occupied)
+    for start in starts:
+        if _legal(piece_type, white_king, black_king, start, WHITE):
+            yield white_king << 12 | black_king << 6 | start
+
+
+def _black_unmoves(index: int) -> Iterator[int]:
+    """Yield the index, less the side to move, of every position with black
+    to move from which a black move leads to the position with white to move
+    at <index>."""
+    white_king = index >> 12 & 63
+    black_king = index >> 6 & 63
+    piece = index & 63
+    occupied = 1 << white_king | 1 << piece
+    for start in squares_of(KING_ATTACKS[black_king] & ~occupied):
+        if not KING_ATTACKS[white_king] >> start & 1:
+            yield white_king << 12 | start << 6 | piece
+
+
+def generate(piece_type: int,
+             promotions: Optional[Dict[int, bytes]] = None) -> bytearray:
+    """Return the table of the ending of king and <piece_type> against king.
+    A pawn ending needs the <promotions> tables of the queen and rook
+    endings, by piece type."""
+    values = bytearray(TABLE_BYTES)
+    # The moves of each position with black to move not yet known to lose.
+    counts = bytearray(1 << 18)
+    lost = []
+    for white_king in range(64):
+        for black_king in range(64):
+            for piece in range(64):
+                if not _legal(piece_type, white_king, black_king, piece,
+                              BLACK):
+                    continue
+                occupied = 1 << white_king | 1 << black_king | 1 << piece
+                # Squares behind the black king along a line of attack are
+                # guarded too, so it is taken off the board.
+                guarded = KING_ATTACKS[white_king] | _attacks(
+                    piece_type, piece, occupied ^ 1 << black_king)
+                index = white_king << 12 | black_king << 6 | piece
+                moves = KING_ATTACKS[black_king] & ~guarded
+                if moves:
+                    counts[index] = popcount(moves)
+                elif guarded >> black_king & 1:
+                    values[1 << 18 | index] = 1
+                    lost.append(index)
+
+    # Promotions reach positions of the other tables: a promotion to a
+    # piece that mates in n moves wins in n + 1.
+    seeds = {}
+    if piece_type == PAWN:
+        for piece in range(48, 56):
+            for white_king in range(64):
+                for black_king in range(64):
+                    if not _legal(PAWN, white_king, black_king, piece,
+                                  WHITE) or piece + 8 in (white_king,
+                                                          black_king):
+                        continue
+                    index = white_king << 12 | black_king << 6 | piece
+                    wins = [promotions[promoted][1 << 18 | index + 8]
+                            for promoted in (QUEEN, ROOK)]
+                    wins = [value for value in wins if value]
+                    if wins:
+                        seeds.setdefault(min(wins), []).append(index)
+
+    plies = 0
+    while lost or seeds:
+        won = []
+        for index in lost:
+            for previous in _white_unmoves(piece_type, index):
+                if not values[previous]:
+                    values[previous] = plies + 2
+                    won.append(previous)
+        for index in seeds.pop(plies + 1, []):
+            if not values[index]:
+                values[index] = plies + 2
+                won.append(index)
+        lost = []
+        for index in won:
+            for previous in _black_unmoves(index):
+                if counts[previous]:
+                    counts[previous] -= 1
+                    if not counts[previous]:
+                        values[1 << 18 | previous] = plies + 3
+                        lost.append(previous)
+        plies += 2
+    return values
+
+
+def _generate_task(task: tuple) -> bytearray:
+    """Return the table of an ending, for a worker process."""
+    return generate(*task)
+
+
+def write_table(path: str, piece_type: int, values: bytes) -> None:
+    """Write the table of the ending with <piece_type> to <path>."""
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, piece_type))
+        file.write(values)
+
+
+def generate_all(names: List[str], directory: str,
+                 processes: Optional[int] = None) -> None:
+    """Generate the tables called <names> in TABLES on <processes> worker
+    processes, one per core if not given, and write each to <directory>."""
+    for name in names:
+        if name not in TABLES:
+            raise ValueError('Unknown table: ' + name)
+    if 'KPK' in names:
+        names = sorted(set(names) | {'KQK', 'KRK'}, key=list(TABLES).index)
+    # The engine imports this module only to probe tables, so the cost of
+    # importing multiprocessing is left to generating them.
+    from multiprocessing.pool import Pool
+
+    os.makedirs(directory, exist_ok=True)
+    done = {}
+    with Pool(processes or os.cpu_count() or 1) as pool:
+        # The pawn ending can only start once the tables it promotes to are
+        # done.
+        for stage in ([name for name in names if TABLES[name] != PAWN],
+                      [name for name in names if TABLES[name] == PAWN]):
+            start = time.perf_counter()
+            tasks = [(TABLES[name], {QUEEN: done.get('KQK'),
+                                     ROOK: done.get('KRK')})
+                     for name in stage]
+            for name, values in zip(stage, pool.map(_generate_task, tasks,
+                                                    chunksize=1)):
+                done[name] = values
+                write_table(os.path.join(directory, name + '.tb'),
+                            TABLES[name], values)
+                print('{} {} positions won, longest mate {} moves, {:.1f}s'
+                      .format(name, sum(1 for value in values[:1 << 18]
+                                        if value),
+                              max(values) // 2, time.perf_counter() - start))
+
+
+class Tablebases:
+    """The table files in a directory, opened for probing.
+
+    === Attributes ===
+    directory:
+        The directory the tables were opened from.
+    """
+    directory: str
+    _tables: Dict[int, mmap.mmap]
+
+    def __init__(self, directory: str) -> None:
+        """Open every table file in <directory>. Raise ValueError if one
+        isn't a table."""
+        self.directory = directory
+        self._tables = {}
+        for name, piece_type in TABLES.items():
+            path = os.path.join(directory, name + '.tb')
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(data) != HEADER.size + TABLE_BYTES or \
+                    HEADER.unpack_from(data) != (MAGIC, VERSION, piece_type):
+                raise ValueError('Not a tablebase file: ' + path)
+            self._tables[piece_type] = data
+
+    def __getstate__(self) -> str:
+        """Pickle the tables as their directory, so each process maps the
+        files itself."""
+        return self.directory
+
+    def __setstate__(self, directory: str) -> None:
+        self.__init__(directory)
+
+    def probe(self, game: GameBoard) -> Optional[tuple]:
+        """Return the (outcome, plies) of the position in <game> with best
+        play: outcome is WIN, DRAW or LOSS for the side to move, and plies
+        the number of single moves until mate. Return None if no table
+        covers the position."""
+        occupied = game.occupancy[2]
+        count = popcount(occupied)
+        if count > MAX_PIECES:
+            return None
+        if count == 2:
+            return DRAW, 0
+        strong = WHITE if popcount(game.occupancy[WHITE]) == 2 else BLACK
+        squares = game.squares
+        piece = -1
+        for sq in squares_of(game.occupancy[strong]):
+            if squares[sq] % 6 != KING:
+                piece = sq
+        piece_type = squares[piece] % 6
+        table = self._tables.get(piece_type)
+        if table is None:
+            return None
+        white_king = game.bitboards[strong * 6 + KING].bit_length() - 1
+        black_king = game.bitboards[(1 - strong) * 6 + KING].bit_length() - 1
+        side = game.side
+        if strong == BLACK:
+            # Flipping the board top to bottom makes black the white side.
+            white_king, black_king, piece = white_king ^ 56, \
+                black_king ^ 56, piece ^ 56
+            side = 1 - side
+        value = table[HEADER.size + table_index(side, white_king, black_king,
+                                                piece)]
+        if not value:
+            return DRAW, 0
+        return (WIN if side == WHITE else LOSS), value - 1
+
+    def best_move(self, game: GameBoard) -> Optional[tuple]:
+        """Return the (move, outcome, plies) of the best move in <game>, which
+        wins fastest, draws, or loses slowest, or None if no table covers
+        the position or there are no legal moves."""
+        if self.probe(game) is None:
+            return None
+        best = None
+        for move in game.legal_moves():
+            game.make_move(move)
+            # Promoting to a piece without a table can only draw.
+            outcome, plies = self.probe(game) or (DRAW, 0)
+            game.unmake_move()
+            # The outcome is the reverse for the side moving, and one more
+            # move away. Wins sort first, soonest first; losses latest first.
+            rank = (-outcome, -plies if outcome == LOSS else plies)
+            if best is None or rank > best[0]:
+                best = (rank, move, -outcome, plies + 1)
+        if best is None:
+            return None
+        return best[1], best[2], best[3] if best[2] != DRAW else 0
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Generate or probe endgame tablebases.')
+    parser.add_argument('command', choices=['generate', 'probe'])
+    parser.add_argument('arguments', nargs='*',
+                        help='tables to generate, or a FEN to probe')
+    parser.add_argument('--directory', '--output', default='tablebases')
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        generate_all(args.arguments or list(TABLES), args.directory,
+                     args.processes)
+        return
+    game = GameBoard.from_fen(' '.join(args.arguments))
+    result = Tablebases(args.directory).best_move(game)
+    if result is None:
+        print('not in the tables')
+        return
+    move, outcome, plies = result
+    print('{} {}'.format(move_name(move), {WIN: 'wins, mate in {} moves',
+                                           DRAW: 'draws',
+                                           LOSS: 'loses, mated in {} moves'}
+                         [outcome].format((plies + 1) // 2)))
+
+
+if __name__ == '__main__':
+    main()
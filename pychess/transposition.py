@@ -0,0 +1,96 @@
+"""A fixed-size transposition table for caching search results by position.
+
+The table is allocated once from a memory budget and never grows. Entries live
+in two flat arrays of 64-bit integers, so storing a result creates no Python
+objects that outlive the call and memory use is the same after a million
+searches as after one.
+"""
+from array import array
+from typing import Optional
+
+from .moves import Move
+
+# The kind of bound a stored score is.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Each entry is an 8-byte key and an 8-byte packed result.
+ENTRY_BYTES = 16
+
+_SCORE_OFFSET = 1 << 31
+
+
+class TranspositionTable:
+    """A table of search results indexed by Zobrist key.
+
+    Keys map to buckets of two entries. The first entry of a bucket keeps the
+    deepest result stored from the current search, the second is replaced by
+    every store that doesn't go in the first, so a bucket always holds both a
+    valuable result and a recent one.
+
+    === Attributes ===
+    buckets:
+        The number of buckets in the table, a power of two.
+    age:
+        The number of the current search, so results kept from older searches
+        can be replaced even when they are deeper.
+    """
+    buckets: int
+    age: int
+    _mask: int
+    _keys: array
+    _data: array
+
+    def __init__(self, megabytes: float = 16) -> None:
+        """Allocate a table that uses at most <megabytes> of memory."""
+        buckets = 1
+        while buckets * 4 * ENTRY_BYTES <= megabytes * 1024 * 1024:
+            buckets *= 2
+        self.buckets = buckets
+        self.age = 0
+        self._mask = buckets - 1
+        self._keys = array('Q', bytes(16 * buckets))
+        self._data = array('Q', bytes(16 * buckets))
+
+    def __len__(self) -> int:
+        """Return the number of entries the table can hold."""
+        return 2 * self.buckets
+
+    def new_search(self) -> None:
+        """Mark the results stored so far as belonging to an older search."""
+        self.age = (self.age + 1) & 63
+
+    def clear(self) -> None:
+        """Forget every stored result."""
+        self._keys = array('Q', bytes(16 * self.buckets))
+        self._data = array('Q', bytes(16 * self.buckets))
+
+    def probe(self, key: int) -> Optional[tuple]:
+        """Return the (depth, bound, score, move) stored for <key>, or None if
+        there is no result for it."""
+        index = (key & self._mask) << 1
+        keys = self._keys
+        if keys[index] == key:
+            data = self._data[index]
+        elif keys[index + 1] == key:
+            data = self._data[index + 1]
+        else:
+            return None
+        return (data >> 16 & 0xFF, data >> 24 & 3,
+                (data >> 26 & 0xFFFFFFFF) - _SCORE_OFFSET, data & 0xFFFF)
+
+    def store(self, key: int, depth: int, bound: int, score: int,
+              move: Move) -> None:
+        """Store the result of searching the position with <key> to <depth>."""
+        index = (key & self._mask) << 1
+        data = (move | min(max(depth, 0), 255) << 16 | bound << 24 |
+                (score + _SCORE_OFFSET) << 26 | self.age << 58)
+        stored = self._data[index]
+        if self._keys[index] == key or stored >> 58 != self.age or \
+                depth >= stored >> 16 & 0xFF:
+            self._keys[index] = key
+            self._data[index] = data
+        else:
+            self._keys[index + 1] = key
+            self._data[index + 1] = data
@@ -0,0 +1,490 @@
+"""The pygame front end: a window showing a game on a GameBoard.
+
+This is the only module of the package that imports pygame, so the rules,
+engine and server run without it. Captures and checks are marked with bursts
+of particles from pychess.particles, which needs NumPy.
+
+Usage:
+    python -m pychess.ui
+"""
+import os
+import pygame
+from array import array
+from typing import Dict, List, Optional
+from pygame.locals import (K_UP, K_DOWN, K_LEFT, K_RIGHT, K_ESCAPE, K_f,
+                           KEYDOWN, QUIT, MOUSEBUTTONDOWN, MOUSEBUTTONUP,
+                           MOUSEMOTION, MOUSEWHEEL)
+
+from .bitboard import PAWN, QUEEN, KING, EMPTY, lsb
+from .chess_game import GameBoard, FEN_LETTERS
+from .moves import (Move, CAPTURE, EN_PASSANT, move_from, move_to, move_flags,
+                    move_promotion, move_squares)
+from .particles import ParticleSystem
+
+# Installed with the package, as package data.
+IMAGE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'images')
+
+# The images in images/ pieces are drawn with, by type of piece. Other pieces
+# are drawn as the letter naming them.
+PIECE_IMAGES = {PAWN: 'blue_pawn', QUEEN: 'blue_queen'}
+
+# The colour of the block behind each side's pieces.
+PIECE_COLOURS = ((0, 255, 0), (255, 0, 0))
+
+# The colour of the ring of particles around a king in check.
+CHECK_COLOUR = (255, 255, 0)
+
+
+class SpriteAtlas:
+    """Every image a tile can show, each drawn once and then reused.
+
+    The images in images/ are loaded and converted to the display's pixel
+    format when the atlas is made. The picture of a tile, with the kind of
+    piece on it and any highlight, is composited the first time it is needed
+    and kept, so drawing a tile is a single blit.
+
+    === Attributes ===
+    size:
+        The width and height of a tile in pixels.
+    images:
+        The images in images/, by file name without '.png', scaled for the
+        pieces and tiles they are drawn on.
+    """
+    size: int
+    images: Dict[str, pygame.Surface]
+    _tiles: Dict[tuple, pygame.Surface]
+
+    def __init__(self, size: int, directory: str = IMAGE_DIRECTORY) -> None:
+        """Load the images in <directory> for tiles of <size> pixels. The
+        display mode must already be set."""
+        self.size = size
+        self.images = {}
+        self._tiles = {}
+        piece_size = size - size // 5
+        # Without the images every piece is drawn as its letter.
+        file_names = os.listdir(directory) if os.path.isdir(directory) else []
+        for file_name in file_names:
+            name, extension = os.path.splitext(file_name)
+            if extension != '.png':
+                continue
+            image = pygame.image.load(os.path.join(directory, file_name))
+            scale = size if name.endswith('tile') else piece_size
+            self.images[name] = pygame.transform.smoothscale(
+                image.convert_alpha(), (scale, scale))
+
+    def tile(self, colour: tuple, kind: int = EMPTY,
+             highlight: Optional[tuple] = None,
+             hovered: bool = False) -> pygame.Surface:
+        """Return the picture of a tile of <colour> holding a piece of
+        <kind>, or EMPTY, tinted with <highlight> and shaded if <hovered>."""
+        key = (colour, kind, highlight, hovered)
+        surface = self._tiles.get(key)
+        if surface is None:
+            surface = self._compose(colour, kind, highlight, hovered)
+            self._tiles[key] = surface
+        return surface
+
+    def _compose(self, colour: tuple, kind: int, highlight: Optional[tuple],
+                 hovered: bool) -> pygame.Surface:
+        """Draw the picture of a tile for the cache."""
+        size = self.size
+        surface = pygame.Surface((size, size)).convert()
+        surface.fill(colour)
+        if highlight is not None:
+            surface.fill(highlight)
+        if kind != EMPTY:
+            offset = size // 10
+            piece_size = size - size // 5
+            surface.fill(PIECE_COLOURS[kind // 6],
+                         (offset, offset, piece_size, piece_size))
+            image = PIECE_IMAGES.get(kind % 6)
+            if image in self.images:
+                surface.blit(self.images[image], (offset, offset))
+            else:
+                font = pygame.font.Font(None, piece_size)
+                letter = font.render(FEN_LETTERS[kind], True, (0, 0, 0))
+                surface.blit(letter, letter.get_rect(
+                    center=(size // 2, size // 2)))
+        if hovered:
+            shade = pygame.Surface((size, size)).convert()
+            shade.fill((128, 128, 128))
+            shade.set_alpha(160)
+            surface.blit(shade, (0, 0))
+        return surface
+
+
+class Tile(pygame.sprite.Sprite):
+    """A single tile on a board.
+
+    == Attributes ==
+
+    colour: the colour of the tile
+    _position: the grid position of the tile in the board (x, y)
+    square: the square of the game the tile shows
+    highlight: the colour the tile is filled with to mark it, or None
+    hovered: whether the mouse is over the tile
+    dirty: whether the tile has changed since it was last drawn
+
+    """
+    colour: tuple
+    position: tuple
+    square: int
+    size: int
+    highlight: Optional[tuple]
+    hovered: bool
+    dirty: bool
+
+    def __init__(self, colour: tuple, pos: tuple, size: int):
+        super(Tile, self).__init__()
+        self.colour = colour
+        self.position = pos
+        self.size = size
+        # Tiles are placed from the top left, squares from white's left.
+        self.square = (BOARD_SIZE - 1 - pos[1]) * BOARD_SIZE + pos[0]
+        self.highlight = None
+        self.hovered = False
+        self.dirty = True
+        self.rect = pygame.Rect(size * pos[0], size * pos[1], size, size)
+
+    def set_highlight(self, highlight: Optional[tuple]) -> None:
+        """Mark the tile with the colour <highlight>, or unmark it."""
+        if highlight != self.highlight:
+            self.highlight = highlight
+            self.dirty = True
+
+    def set_hovered(self, hovered: bool) -> None:
+        """Shade the tile or not, as the mouse moves over and off it."""
+        if hovered != self.hovered:
+            self.hovered = hovered
+            self.dirty = True
+
+
+class Board:
+    """A board for playing chess, showing the game in a GameBoard.
+
+    The board holds none of the game itself: the piece on each tile is read
+    from the game when the tile is drawn. The board listens for the moves
+    played in the game and marks only the tiles they change to be drawn
+    again.
+
+    The tile under each pixel is found through two arrays made whenever the
+    board is laid out, one giving the column of the board under each pixel
+    across the screen and one the row under each pixel down it, so finding a
+    tile is two array lookups however the board is placed.
+
+    === Attributes ===
+    game:
+        The game shown on the board.
+    origin:
+        The pixel at the top left corner of the board.
+    tile_size:
+        The width and height of a tile in pixels.
+    flipped:
+        Whether the board is turned around, with the first row and column of
+        tiles at the bottom right.
+    """
+    game: GameBoard
+    tiles: List[Tile]
+    map: dict
+    atlas: SpriteAtlas
+    origin: tuple
+    tile_size: int
+    flipped: bool
+    _screen_size: tuple
+    _columns: array
+    _rows: array
+    _grid: List[Tile]
+    _squares: List[Tile]
+    _moved: bool
+
+    def __init__(self, game: GameBoard, tiles: List[Tile],
+                 atlas: SpriteAtlas, screen_size: tuple,
+                 origin: tuple = (0, 0), flipped: bool = False):
+        """Show <game> on <tiles>, laid out on a screen of <screen_size>
+        pixels with the board's top left corner at <origin>."""
+        self.game = game
+        self.tiles = tiles
+        self.atlas = atlas
+        self.map = {}
+        for til in tiles:
+            self.map[til.position] = til
+        self._grid = [self.map[(i, j)] for j in range(BOARD_SIZE)
+                      for i in range(BOARD_SIZE)]
+        self._squares = [None] * (BOARD_SIZE * BOARD_SIZE)
+        for til in tiles:
+            self._squares[til.square] = til
+        self._screen_size = screen_size
+        self.layout(origin, atlas.size, flipped)
+        game.listeners.append(self.on_move)
+
+    def on_move(self, move: Move) -> None:
+        """Mark the tiles changed by <move>, just played in the game, to be
+        drawn again."""
+        for sq in move_squares(move):
+            self._squares[sq].dirty = True
+
+    def tile_of(self, sq: int) -> Tile:
+        """Return the tile showing square <sq> of the game."""
+        return self._squares[sq]
+
+    def invalidate(self, rect: pygame.Rect) -> None:
+        """Mark the tiles overlapping <rect> to be drawn again, after
+        something else was drawn over them."""
+        for til in self.tiles:
+            if til.rect.colliderect(rect):
+                til.dirty = True
+
+    def layout(self, origin: tuple, tile_size: int, flipped: bool) -> None:
+        """Place the board with its top left corner at <origin>, tiles of
+        <tile_size> pixels, and turned around if <flipped>."""
+        self.origin = origin
+        self.tile_size = tile_size
+        self.flipped = flipped
+        if tile_size != self.atlas.size:
+            self.atlas = SpriteAtlas(tile_size)
+        width, height = self._screen_size
+        self._columns = _axis_index(width, origin[0], tile_size, flipped)
+        self._rows = _axis_index(height, origin[1], tile_size, flipped)
+        for til in self.tiles:
+            i, j = til.position
+            if flipped:
+                i, j = BOARD_SIZE - 1 - i, BOARD_SIZE - 1 - j
+            til.size = tile_size
+            til.rect = pygame.Rect(origin[0] + tile_size * i,
+                                   origin[1] + tile_size * j,
+                                   tile_size, tile_size)
+            til.dirty = True
+        self._moved = True
+
+    def get_tile_at(self, position: tuple) -> Optional[Tile]:
+        """Return the tile under the pixel at <position>, or None."""
+        x, y = position
+        if not (0 <= x < len(self._columns) and 0 <= y < len(self._rows)):
+            return None
+        i = self._columns[x]
+        j = self._rows[y]
+        if i < 0 or j < 0:
+            return None
+        return self._grid[j * BOARD_SIZE + i]
+
+    def draw(self, surface: pygame.Surface) -> List[pygame.Rect]:
+        """Draw the tiles that have changed since they were last drawn onto
+        <surface>, and return the areas drawn over."""
+        rects = []
+        if self._moved:
+            # Whatever was under the board before it moved is cleared.
+            surface.fill((0, 0, 0))
+            rects.append(surface.get_rect())
+            self._moved = False
+        squares = self.game.squares
+        for til in self.tiles:
+            if til.dirty:
+                surface.blit(self.atlas.tile(til.colour, squares[til.square],
+                                             til.highlight, til.hovered),
+                             til.rect)
+                rects.append(til.rect)
+                til.dirty = False
+        return rects
+
+
+class Effects:
+    """Bursts of particles over a board, marking the captures and checks of
+    the moves played in its game.
+
+    === Attributes ===
+    board:
+        The board the effects are drawn over.
+    particles:
+        The particles flying.
+    """
+    board: Board
+    particles: ParticleSystem
+    _drawn: Optional[pygame.Rect]
+
+    def __init__(self, board: Board) -> None:
+        self.board = board
+        self.particles = ParticleSystem(gravity=board.tile_size * 4)
+        self._drawn = None
+        board.game.listeners.append(self.on_move)
+
+    def on_move(self, move: Move) -> None:
+        """Burst particles from the piece taken by <move>, just played in the
+        game, and around the king it puts in check."""
+        board = self.board
+        game = board.game
+        size = board.tile_size
+        flags = move_flags(move)
+        if flags & CAPTURE:
+            # A pawn taken en passant is beside the square moved to, not on
+            # it, and the side to move now is the side that lost the piece.
+            taken = move_to(move)
+            if flags == EN_PASSANT:
+                taken ^= 8
+            self.particles.emit(size * 6, board.tile_of(taken).rect.center,
+                                size * 3, PIECE_COLOURS[game.side], 1.0)
+        if game.in_check():
+            king = lsb(game.bitboards[game.side * 6 + KING])
+            self.particles.emit(size * 12, board.tile_of(king).rect.center,
+                                size, CHECK_COLOUR, 0.75, size / 2)
+
+    def update(self, seconds: float,
+               surface: pygame.Surface) -> Optional[pygame.Rect]:
+        """Move the particles on by <seconds> and rub out where they were
+        last drawn on <surface>, marking the tiles under them to be drawn
+        again. Return the area rubbed out, or None."""
+        self.particles.update(seconds)
+        drawn = self._drawn
+        if drawn is not None:
+            self.board.invalidate(drawn)
+            surface.fill((0, 0, 0), drawn)
+            self._drawn = None
+        return drawn
+
+    def draw(self, surface: pygame.Surface) -> Optional[pygame.Rect]:
+        """Draw the particles onto <surface>, over the board, and return the
+        area drawn over, or None."""
+        self._drawn = self.particles.draw(surface)
+        return self._drawn
+
+
+def _axis_index(length: int, start: int, tile_size: int,
+                flipped: bool) -> array:
+    """Return the column (or row) of the board under each of <length>
+    pixels along one axis of the screen, or -1 where there is none, for a
+    board starting at pixel <start>."""
+    index = array('b', [-1]) * length
+    for pixel in range(max(start, 0), min(start + tile_size * BOARD_SIZE,
+                                           length)):
+        tile = (pixel - start) // tile_size
+        index[pixel] = BOARD_SIZE - 1 - tile if flipped else tile
+    return index
+
+
+SCREEN_WIDTH = 1400
+SCREEN_HEIGHT = 800
+BOARD_SIZE = 8
+PLAYING_SPACE = min(SCREEN_HEIGHT, SCREEN_WIDTH)
+TILE_SIZE = PLAYING_SPACE//BOARD_SIZE
+# Frames drawn per second at most. Only tiles that changed are redrawn, so an
+# idle board costs little more than checking for events.
+FPS = 60
+
+# temps
+TEMP_COLOUR_ONE = (255, 0, 0)
+TEMP_COLOUR_TWO = (0, 255, 0)
+TEMP_COLOUR_THREE = (0, 0, 255)
+
+
+def main() -> None:
+    """Open a window showing a new game, played by clicking a piece and
+    then the tile to move it to."""
+    pygame.init()
+    screen = pygame.display.set_mode([SCREEN_WIDTH, SCREEN_HEIGHT])
+
+    tile_list = []
+
+    # Set up Tiles, alternating black and white
+    for i in range(BOARD_SIZE):
+        for j in range(BOARD_SIZE):
+            if i % 2 == 0:
+                if j % 2 == 0:
+                    new_tile = Tile((255, 255, 255), (i, j), TILE_SIZE)
+                else:
+                    new_tile = Tile((0, 0, 0), (i, j), TILE_SIZE)
+            else:
+                if j % 2 == 0:
+                    new_tile = Tile((0, 0, 0), (i, j), TILE_SIZE)
+
+                else:
+                    new_tile = Tile((255, 255, 255), (i, j), TILE_SIZE)
+            tile_list.append(new_tile)
+
+    game = GameBoard()
+    board = Board(game, tile_list, SpriteAtlas(TILE_SIZE),
+                  (SCREEN_WIDTH, SCREEN_HEIGHT))
+    effects = Effects(board)
+
+    screen.fill((0, 0, 0))
+    board.draw(screen)
+    pygame.display.flip()
+    clock = pygame.time.Clock()
+
+    previous_hover_tile = None
+    # The legal moves of the piece picked up, by the square each ends on.
+    selected_moves = {}
+    marked_tiles = []
+    running = True
+    while running:
+        # Only where the mouse ended up this frame matters, so a burst of
+        # motion events is handled once.
+        motion = None
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                running = False
+
+            if event.type == MOUSEMOTION:
+                motion = event.pos
+
+            if event.type == KEYDOWN and event.key == K_f:
+                board.layout(board.origin, board.tile_size, not board.flipped)
+
+            if event.type == MOUSEBUTTONDOWN:
+                selected_tile = board.get_tile_at(event.pos)
+                for marked in marked_tiles:
+                    marked.set_highlight(None)
+                marked_tiles = []
+                if selected_tile is None:
+                    selected_moves = {}
+                elif selected_tile.square in selected_moves:
+                    # Pawns reaching the last row always become queens.
+                    move = selected_moves[selected_tile.square]
+                    selected_moves = {}
+                    game.apply_move(move)
+                    if not game.legal_moves():
+                        if game.in_check():
+                            pygame.display.set_caption(
+                                game.players[1 - game.side].name.capitalize()
+                                + ' wins by checkmate')
+                        else:
+                            pygame.display.set_caption('Stalemate')
+                else:
+                    selected_moves = {}
+                    for move in game.legal_moves():
+                        if move_from(move) == selected_tile.square and \
+                                move_promotion(move) in (-1, QUEEN):
+                            selected_moves[move_to(move)] = move
+                    if selected_moves:
+                        selected_tile.set_highlight(TEMP_COLOUR_THREE)
+                        marked_tiles.append(selected_tile)
+                        for sq in selected_moves:
+                            marked = board.tile_of(sq)
+                            marked.set_highlight(TEMP_COLOUR_TWO)
+                            marked_tiles.append(marked)
+
+        if motion is not None:
+            hover_tile = board.get_tile_at(motion)
+            if hover_tile is not None and hover_tile != previous_hover_tile:
+                if previous_hover_tile is not None:
+                    previous_hover_tile.set_hovered(False)
+                hover_tile.set_hovered(True)
+                previous_hover_tile = hover_tile
+
+        # The particles of the last frame are rubbed out before the board is
+        # drawn, and this frame's are drawn over it.
+        erased = effects.update(clock.get_time() / 1000, screen)
+        changed = board.draw(screen)
+        if erased is not None:
+            changed.append(erased)
+        drawn = effects.draw(screen)
+        if drawn is not None:
+            changed.append(drawn)
+        if changed:
+            pygame.display.update(changed)
+        clock.tick(FPS)
+
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+"""Zobrist keys for identifying chess positions.
+
+A position's key is the XOR of a random 64-bit number for each piece on each
+square, for the castling rights, for the column of the en passant square and
+for black being to move. Making a move only XORs the keys of what changed, so
+the key is kept up to date as cheaply as the bitboards are.
+"""
+import random
+
+_generator = random.Random(20200601)
+
+# PIECE_KEYS[kind][sq] is the key of a piece of <kind> standing on <sq>.
+PIECE_KEYS = [[_generator.getrandbits(64) for _ in range(64)]
+              for _ in range(12)]
+# CASTLING_KEYS[rights] is the key of a set of castling rights.
+CASTLING_KEYS = [_generator.getrandbits(64) for _ in range(16)]
+CASTLING_KEYS[0] = 0
+# EP_KEYS[col] is the key of an en passant square in column <col>.
+EP_KEYS = [_generator.getrandbits(64) for _ in range(8)]
+BLACK_TO_MOVE = _generator.getrandbits(64)
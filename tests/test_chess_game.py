@@ -0,0 +1,81 @@
+import pickle
+
+import pytest
+
+from pychess.bitboard import WHITE
+from pychess.chess_game import GameBoard
+from pychess.moves import EN_PASSANT
+
+
+@pytest.mark.parametrize('fen', [
+    '4k3/8/8/8/8/8/8/4K3 w K - 0 1',
+    '4k3/8/8/8/8/8/8/R3K3 w K - 0 1',
+    'r3k3/8/8/8/8/8/8/4K3 b k - 0 1',
+    '4k2r/8/8/8/8/8/8/4K3 b q - 0 1',
+])
+def test_from_fen_rejects_castling_without_king_and_rook(fen):
+    with pytest.raises(ValueError):
+        GameBoard.from_fen(fen)
+
+
+def test_from_fen_keeps_castling_with_king_and_rook():
+    game = GameBoard.from_fen('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+    assert game.to_fen() == 'r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1'
+    for move in game.legal_moves():
+        game.make_move(move)
+        game.unmake_move()
+
+
+def test_generate_moves_of_side_not_to_move_has_no_en_passant():
+    game = GameBoard()
+    e2e4 = next(move for move in game.legal_moves()
+                if move & 63 == 12 and move >> 6 & 63 == 28)
+    game.make_move(e2e4)
+    for move in game.generate_moves(WHITE):
+        assert move >> 12 != EN_PASSANT
+        game.make_move(move)
+        game.unmake_move()
+
+
+@pytest.mark.parametrize('fen', [
+    '4k3/8/8/8/8/3P4/8/4K3 w - e4 0 1',
+    '4k3/8/8/8/4P3/8/8/4K3 b - e6 0 1',
+    '4k3/8/8/8/8/8/8/4K3 b - e3 0 1',
+    '4k3/8/4p3/4p3/8/8/8/4K3 w - e6 0 1',
+])
+def test_from_fen_rejects_impossible_en_passant_squares(fen):
+    with pytest.raises(ValueError):
+        GameBoard.from_fen(fen)
+
+
+@pytest.mark.parametrize('fen', [
+    '4k3/8/8/3Pp3/8/8/8/4K3 w - e6 0 1',
+    '4k3/8/8/8/3pP3/8/8/4K3 b - e3 0 1',
+])
+def test_from_fen_keeps_possible_en_passant_squares(fen):
+    game = GameBoard.from_fen(fen)
+    assert game.to_fen() == fen
+    assert GameBoard.decode(game.encode()).to_fen() == fen
+    assert any(move >> 12 == EN_PASSANT for move in game.legal_moves())
+
+
+@pytest.mark.parametrize('fen', [
+    '4R1k1/8/8/8/8/8/8/6K1 w - - 0 1',
+    '4k3/8/8/8/8/8/8/r3K3 b - - 0 1',
+])
+def test_from_fen_rejects_side_not_to_move_in_check(fen):
+    with pytest.raises(ValueError):
+        GameBoard.from_fen(fen)
+
+
+def test_pickled_board_still_sees_repetitions():
+    game = GameBoard()
+    # Ng1-f3, Ng8-f6, Nf3-g1, Nf6-g8
+    for start, stop in [(6, 21), (62, 45), (21, 6), (45, 62)]:
+        game.make_move(next(move for move in game.legal_moves()
+                            if move & 63 == start and
+                            move >> 6 & 63 == stop))
+    copy = pickle.loads(pickle.dumps(game))
+    assert copy.key == game.key
+    assert copy.is_repetition()
+    assert copy.repetitions() == game.repetitions() == 2
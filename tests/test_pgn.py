@@ -0,0 +1,55 @@
+import pytest
+
+from pychess.chess_game import GameBoard
+from pychess.pgn import parse_san, read_games
+
+
+def _after(*sans):
+    game = GameBoard()
+    for text in sans:
+        game.make_move(parse_san(game, text))
+    return game
+
+
+@pytest.mark.parametrize('text', ['g8', 'e1', 'e9', 'Zf3', 'e6', 'exd5',
+                                  'Nf6', 'O-O', 'e4=Q'])
+def test_parse_san_rejects_malformed_moves(text):
+    game = _after('e4', 'Nf6')
+    with pytest.raises(ValueError):
+        parse_san(game, text)
+
+
+def test_parse_san_rejects_black_pawn_to_eighth_row():
+    game = _after('e4', 'Nf6', 'd4')
+    with pytest.raises(ValueError):
+        parse_san(game, 'g8')
+
+
+def test_read_games_records_bad_fen_and_carries_on():
+    text = ('[Event "bad"]\n'
+            '[FEN "4k3/8/8/8/8/8/8/4K3 w K - 0 1"]\n'
+            '\n'
+            '1. Kd2 *\n'
+            '\n'
+            '[Event "good"]\n'
+            '\n'
+            '1. e4 e5 1-0\n')
+    bad, good = read_games(text.splitlines(True))
+    assert bad.error is not None
+    assert bad.moves == []
+    assert good.error is None
+    assert len(good.moves) == 2
+    assert good.result == '1-0'
+
+
+def test_read_games_carries_on_after_bad_move():
+    text = ('1. e4 Nf6 2. d4 g8 3. e5 *\n'
+            '\n'
+            '1. d4 d5 2. c4 1/2-1/2\n')
+    games = list(read_games(text.splitlines(True)))
+    assert len(games) == 2
+    assert games[0].error is not None
+    assert len(games[0].moves) == 3
+    assert games[1].error is None
+    assert len(games[1].moves) == 3
+    assert games[1].result == '1/2-1/2'